@@ -0,0 +1,3 @@
+from plantation.cli import main
+
+main()
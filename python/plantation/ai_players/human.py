@@ -8,6 +8,7 @@ from plantation.include import display_board_text
 
 class HumanPlayer (Player):
 
+    copy_board = True
     prev_board = None
 
     def get_move(
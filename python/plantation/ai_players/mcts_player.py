@@ -0,0 +1,323 @@
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from plantation.game_state import GameState
+from plantation.include import RESULT_OK, RESULT_OCCUPIED, cross_sum
+from plantation.legal_moves import compute_legal_moves
+from plantation.move_result import MoveResult
+from plantation.player import Player
+
+Move = Tuple[str, Tuple[int, ...]]
+
+
+class SearchNode:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'total')
+
+    def __init__(self, move: Optional[Move], parent: Optional['SearchNode'], untried: List[Move]):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.total = 0.
+
+    def select_child(self, exploration: float) -> 'SearchNode':
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.total / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        )
+
+
+class MCTSPlayer (Player):
+    """ Determinized Monte-Carlo tree search over the moves of the current turn.
+
+    Each iteration samples a full board: the opponent tiles that have been
+    observed recently are kept, and the rest are guessed from a prior that
+    favours the opponent's home side. The tree then covers this player's
+    remaining moves of the turn, followed by a short random rollout for both
+    players. Search stops at a deadline worked out from the clock, so the
+    player spends the time it is given and no more.
+    """
+
+    structured_results = True
+    rollout_weights = {'fertilise': 3, 'plant': 4, 'colonise': 1, 'spray': 1, 'bomb': 1}
+
+    def __init__(
+            self,
+            name: Optional[str] = None,
+            starting_seconds: float = 1.0,
+            time_increment: float = 0.1,
+            max_turns: int = 100,
+            time_fraction: float = 0.8,
+            rollout_turns: int = 2,
+            exploration: float = 4.0,
+            max_candidates: int = 6,
+            memory_turns: int = 10,
+            max_iterations: Optional[int] = None
+    ):
+        super().__init__(name)
+        self.starting_seconds = starting_seconds
+        self.time_increment = time_increment
+        self.max_turns = max_turns
+        self.time_fraction = time_fraction
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.max_candidates = max_candidates
+        self.memory_turns = memory_turns
+        self.max_iterations = max_iterations
+
+        self.opp_seen = None
+        self.turn_seen = None
+        self.prior = None
+        self.estimate = None
+        # one entry per get_move: turn, moves_remaining, budget, elapsed, iterations, depth
+        self.search_log: List[Dict] = []
+
+    def start_game(self, board_shape: Tuple[int], sign: int):
+        super().start_game(board_shape, sign)
+        # absolute opponent score of each tile when last observed, and when that was
+        self.opp_seen = np.zeros(board_shape)
+        self.turn_seen = np.full(board_shape, -1)
+
+        # the opponent starts in the far column and spreads from there
+        cols = np.arange(board_shape[1])
+        opp_home_col = board_shape[1] - 1 if sign > 0 else 0
+        col_weights = np.exp(-np.abs(cols - opp_home_col) / 3.)
+        self.prior = np.tile(col_weights, (board_shape[0], 1))
+        self.search_log = []
+
+    def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+        start_time = time.perf_counter()
+        budget = self.move_budget(turn, time_remaining)
+        self.estimate = self.estimate_opponent(board, turn)
+
+        move, iterations, depth = self.search(board, turn, moves_remaining, start_time + budget)
+
+        self.search_log.append({
+            'turn': turn,
+            'moves_remaining': moves_remaining,
+            'budget': budget,
+            'elapsed': time.perf_counter() - start_time,
+            'iterations': iterations,
+            'depth': depth,
+        })
+        return move[0], list(move[1])
+
+    def move_budget(self, turn: int, time_remaining: float) -> float:
+        """ Seconds to spend on this move: a share of the per-move increment,
+        plus an even share of whatever is banked above a safety margin. """
+        moves_left = max((self.max_turns - turn + 1) * 3, 1)
+        reserve = 0.2 * self.starting_seconds
+        banked = max(time_remaining - reserve, 0.)
+        return self.time_fraction * (self.time_increment / 3 + banked / moves_left)
+
+    def search(
+            self, board: np.ndarray, turn: int, moves_remaining: int, deadline: float
+    ) -> Tuple[Move, int, int]:
+        root_state = self.sample_state(board, turn, moves_remaining)
+        root = SearchNode(None, None, self.candidate_moves(root_state))
+        end_turn = min(turn + self.rollout_turns, self.max_turns + 1)
+
+        iterations = 0
+        max_depth = 0
+        while iterations == 0 or time.perf_counter() < deadline:
+            if self.max_iterations is not None and iterations >= self.max_iterations:
+                break
+            state = self.sample_state(board, turn, moves_remaining)
+            start_score = state.score()
+            node = root
+            depth = 0
+
+            # selection, staying within this player's moves for the turn
+            while not node.untried and node.children and state.sign == self.sign:
+                node = node.select_child(self.exploration)
+                state.apply(*node.move)
+                depth += 1
+
+            # expansion
+            if node.untried and state.sign == self.sign:
+                move = node.untried.pop()
+                state.apply(*move)
+                depth += 1
+                untried = self.candidate_moves(state) if state.sign == self.sign else []
+                child = SearchNode(move, node, untried)
+                node.children.append(child)
+                node = child
+
+            self.rollout(state, end_turn)
+            reward = self.sign * (state.score() - start_score)
+            while node is not None:
+                node.visits += 1
+                node.total += reward
+                node = node.parent
+
+            iterations += 1
+            max_depth = max(max_depth, depth)
+
+        if not root.children:
+            return ('scout', (5, 5)), iterations, max_depth
+        best = max(root.children, key=lambda child: child.visits)
+        return best.move, iterations, max_depth
+
+    def estimate_opponent(self, board: np.ndarray, turn: int) -> np.ndarray:
+        """ Expected absolute opponent score per tile under the current beliefs. """
+        fresh = (self.turn_seen >= 0) & (turn - self.turn_seen <= self.memory_turns)
+        unknown = ~fresh & (board == 0)
+        probs = self.unknown_tile_probabilities(unknown, fresh, turn)
+
+        estimate = np.where(fresh, self.opp_seen, probs * self.mean_tile_score(turn))
+        estimate[board != 0] = 0
+        return estimate
+
+    def unknown_tile_probabilities(self, unknown: np.ndarray, fresh: np.ndarray, turn: int) -> np.ndarray:
+        expected_tiles = min(3 + 0.8 * (turn - 1), 0.5 * unknown.size)
+        missing = max(expected_tiles - np.count_nonzero(self.opp_seen[fresh] > 0), 0.)
+        # stale sightings of opponent tiles make those tiles more likely still to be held
+        weights = np.where(unknown, self.prior * (1 + self.opp_seen), 0.)
+        total_weight = weights.sum()
+        if total_weight == 0:
+            return weights
+        return np.minimum(missing * weights / total_weight, 1.)
+
+    @staticmethod
+    def mean_tile_score(turn: int) -> float:
+        return 1 + min(turn / 30., 2.)
+
+    def sample_state(self, board: np.ndarray, turn: int, moves_remaining: int) -> GameState:
+        fresh = (self.turn_seen >= 0) & (turn - self.turn_seen <= self.memory_turns)
+        unknown = ~fresh & (board == 0)
+        probs = self.unknown_tile_probabilities(unknown, fresh, turn)
+
+        opp = np.where(fresh, self.opp_seen, 0)
+        guessed = self.np_rng.random(board.shape) < probs
+        extra = self.np_rng.poisson(self.mean_tile_score(turn) - 1, size=board.shape)
+        opp = np.where(guessed, 1 + extra, opp)
+        opp[board != 0] = 0
+
+        full_board = (board - self.sign * opp).astype(np.short)
+        return GameState(full_board, turn, self.sign, moves_remaining, self.max_turns)
+
+    def candidate_moves(self, state: GameState) -> List[Move]:
+        player_board = state.player_board(self.sign)
+        legal_moves = compute_legal_moves(player_board, state.moves_remaining)
+        k = self.max_candidates
+        moves = []
+
+        for row, col in self.sample_tiles(legal_moves.plant, k):
+            moves.append(('plant', (row, col)))
+        for row, col in self.sample_tiles(legal_moves.fertilise, k // 2):
+            moves.append(('fertilise', (row, col)))
+
+        # scout where our picture of the opponent is oldest and most uncertain
+        staleness = np.where(self.turn_seen < 0, state.turn, state.turn - self.turn_seen) * self.prior
+        centre_scores = cross_sum(staleness)[1:-1, 1:-1]
+        for index in np.argsort(centre_scores, axis=None)[-2:]:
+            row, col = np.unravel_index(index, centre_scores.shape)
+            moves.append(('scout', (int(row) + 1, int(col) + 1)))
+
+        if state.moves_remaining >= 2:
+            estimate = np.where(player_board != 0, 0, self.estimate)
+            for index in np.argsort(estimate, axis=None)[-(k // 2):]:
+                row, col = np.unravel_index(index, estimate.shape)
+                if estimate[row, col] > 0:
+                    moves.append(('bomb', (int(row), int(col))))
+            spray_scores = cross_sum(np.minimum(estimate, 1))
+            for index in np.argsort(spray_scores, axis=None)[-(k // 2):]:
+                row, col = np.unravel_index(index, spray_scores.shape)
+                if spray_scores[row, col] > 0:
+                    moves.append(('spray', (int(row), int(col))))
+
+            sources = legal_moves.colonise_sources
+            if len(sources) > 0:
+                for row, col in self.sample_tiles(legal_moves.colonise_targets, k // 2):
+                    source_row, source_col = self.rng.choice(sources)
+                    moves.append(('colonise', (row, col, int(source_row), int(source_col))))
+
+        self.rng.shuffle(moves)
+        return moves
+
+    def sample_tiles(self, tiles: np.ndarray, k: int) -> List[Tuple[int, int]]:
+        if len(tiles) > k:
+            tiles = tiles[self.np_rng.choice(len(tiles), k, replace=False)]
+        return [(int(row), int(col)) for row, col in tiles]
+
+    def rollout(self, state: GameState, end_turn: int) -> None:
+        while state.turn < end_turn:
+            legal_moves = compute_legal_moves(state.player_board(state.sign), state.moves_remaining)
+            options = legal_moves.moves()
+            if len(options) == 0:
+                state.apply('scout', [5, 5])
+                continue
+
+            move = self.rng.choices(options, weights=[self.rollout_weights[o] for o in options])[0]
+            if move == 'colonise':
+                row, col = self.rng.choice(legal_moves.colonise_targets)
+                source_row, source_col = self.rng.choice(legal_moves.colonise_sources)
+                state.apply(move, [row, col, source_row, source_col])
+            else:
+                state.apply(move, self.rng.choice(getattr(legal_moves, move)))
+
+    def handle_move_result(self, move, turn, pos, result):
+        if isinstance(result, str):
+            result = MoveResult.from_string(result)
+        row, col = pos[0], pos[1]
+
+        if move == 'scout' and result.code == RESULT_OK:
+            top, left = max(row - 1, 0), max(col - 1, 0)
+            bottom = min(row + 2, self.opp_seen.shape[0])
+            right = min(col + 2, self.opp_seen.shape[1])
+            vals = np.asarray(result.scout).reshape(bottom - top, right - left) * self.sign
+            self.opp_seen[top:bottom, left:right] = np.where(vals < 0, -vals, 0)
+            self.turn_seen[top:bottom, left:right] = turn
+
+        elif move in ('plant', 'colonise'):
+            if result.code == RESULT_OCCUPIED:
+                self.opp_seen[row, col] = abs(result.value)
+                self.turn_seen[row, col] = turn
+            elif result.code == RESULT_OK:
+                self.opp_seen[row, col] = 0
+                self.turn_seen[row, col] = turn
+
+        elif move == 'bomb' and result.code == RESULT_OK:
+            # fewer than 4 levels means the tile has been cleared
+            self.opp_seen[row, col] = max(self.opp_seen[row, col] - result.value, 0)
+            if result.value < 4:
+                self.opp_seen[row, col] = 0
+                self.turn_seen[row, col] = turn
+
+        elif move == 'spray' and result.code == RESULT_OK:
+            for delta_r, delta_c in ((-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)):
+                test_row, test_col = row + delta_r, col + delta_c
+                if 0 <= test_row < self.opp_seen.shape[0] and 0 <= test_col < self.opp_seen.shape[1]:
+                    if result.value == 0:
+                        self.opp_seen[test_row, test_col] = 0
+                        self.turn_seen[test_row, test_col] = turn
+                    else:
+                        self.opp_seen[test_row, test_col] = max(self.opp_seen[test_row, test_col] - 1, 0)
+
+    def search_summary(self) -> Dict[str, float]:
+        """ Search effort over the moves played so far. """
+        log = self.search_log
+        if len(log) == 0:
+            return {}
+        iterations = np.array([entry['iterations'] for entry in log])
+        elapsed = np.array([entry['elapsed'] for entry in log])
+        return {
+            'moves': len(log),
+            'mean_iterations': float(iterations.mean()),
+            'mean_latency': float(elapsed.mean()),
+            'max_latency': float(elapsed.max()),
+            'mean_budget': float(np.mean([entry['budget'] for entry in log])),
+            'mean_depth': float(np.mean([entry['depth'] for entry in log])),
+            'iterations_per_second': float(iterations.sum() / max(elapsed.sum(), 1e-9)),
+        }
@@ -0,0 +1,169 @@
+<?php
+
+/**
+ * Reference PHP client for the binary bot protocol described in
+ * python/plantation/bot_protocol.py.
+ *
+ * runBinaryBot() reads frames from STDIN and passes them to player objects with
+ * - getMove($board, $turn, $movesRemaining, $timeRemaining), which returns [$move, $pos]
+ * - handleMoveResult($move, $turn, $pos, $result), with $result in the text format, e.g. "OK 3"
+ * - endGame($yourScore, $opponentScore)
+ * One process can host many games at once through sessions, each with its own player.
+ */
+
+const BOT_MOVE_TYPES = ['fertilise', 'plant', 'scout', 'colonise', 'spray', 'bomb'];
+const BOT_RESULT_NAMES = ['OK', 'error', 'occupied'];
+const BOT_NO_COORD = -128;
+
+const BOT_INIT = 0x01;
+const BOT_START_GAME = 0x02;
+const BOT_GET_MOVE = 0x03;
+const BOT_MOVE_RESULT = 0x04;
+const BOT_END_GAME = 0x05;
+const BOT_OPEN_SESSION = 0x06;
+const BOT_SESSION_RESULT = 0x07;
+const BOT_CLOSE_SESSION = 0x08;
+const BOT_GET_MOVE_BATCH = 0x09;
+const BOT_MOVE = 0x81;
+const BOT_READY = 0x82;
+const BOT_MOVE_BATCH = 0x83;
+
+function botReadExactly($stream, $length) {
+    $data = '';
+    while (strlen($data) < $length) {
+        $chunk = fread($stream, $length - strlen($data));
+        if ($chunk === false || $chunk === '') {
+            return null;
+        }
+        $data .= $chunk;
+    }
+    return $data;
+}
+
+/** @return array|null [type, body], or null at the end of the stream */
+function botReadFrame($stream) {
+    $header = botReadExactly($stream, 4);
+    if ($header === null) return null;
+    $payload = botReadExactly($stream, unpack('V', $header)[1]);
+    if ($payload === null) return null;
+    return [ord($payload[0]), substr($payload, 1)];
+}
+
+function botWriteFrame($stream, $type, $body = '') {
+    fwrite($stream, pack('V', strlen($body) + 1) . chr($type) . $body);
+    fflush($stream);
+}
+
+// PHP has no little-endian signed formats for unpack, so read unsigned and convert
+function botSigned16($value) {
+    return $value >= 0x8000 ? $value - 0x10000 : $value;
+}
+
+function botSigned32($value) {
+    return $value >= 0x80000000 ? $value - 0x100000000 : $value;
+}
+
+function botDecodePos($move, $coords) {
+    $pos = [];
+    foreach (array_slice($coords, 0, $move == 'colonise' ? 4 : 2) as $coord) {
+        if ($coord != BOT_NO_COORD) $pos[] = $coord;
+    }
+    return $pos;
+}
+
+function botStartGame($makePlayer, $name, $body) {
+    $data = unpack('csign/Crows/Ccols', $body);
+    return [$makePlayer($name, $data['sign']), $data['rows'], $data['cols']];
+}
+
+function botGetMove($player, $cols, $body) {
+    $start = microtime(true);
+    $data = unpack('vturn/CmovesRemaining/etimeRemaining', $body);
+    $tiles = array_values(unpack('v*', substr($body, 11)));
+    $board = [];
+    foreach ($tiles as $i => $value) {
+        $board[intdiv($i, $cols)][$i % $cols] = botSigned16($value);
+    }
+    [$move, $pos] = $player->getMove($board, $data['turn'], $data['movesRemaining'], $data['timeRemaining']);
+    $moveCode = array_search($move, BOT_MOVE_TYPES, true);
+    $coords = array_pad(array_map('intval', array_values($pos)), 4, BOT_NO_COORD);
+    return [pack('Ccccc', $moveCode === false ? 255 : $moveCode, ...$coords), microtime(true) - $start];
+}
+
+function botHandleMoveResult($player, $body) {
+    $data = unpack('Cmove/vturn/crow/ccol/csourceRow/csourceCol/Ccode/ChasValue/vvalue/CnumScout', $body);
+    $move = BOT_MOVE_TYPES[$data['move']] ?? '';
+    $pos = botDecodePos($move, [$data['row'], $data['col'], $data['sourceRow'], $data['sourceCol']]);
+    $result = BOT_RESULT_NAMES[$data['code']];
+    if ($data['numScout'] > 0) {
+        $scout = array_map('botSigned16', array_values(unpack('v*', substr($body, 12, 2 * $data['numScout']))));
+        $result .= ' ' . implode(',', $scout);
+    } elseif ($data['hasValue']) {
+        $result .= ' ' . botSigned16($data['value']);
+    }
+    $player->handleMoveResult($move, $data['turn'], $pos, $result);
+}
+
+function botEndGame($player, $body) {
+    $data = unpack('VyourScore/VopponentScore', $body);
+    $player->endGame(botSigned32($data['yourScore']), botSigned32($data['opponentScore']));
+}
+
+/**
+ * Answers messages until the engine closes STDIN. $makePlayer($name, $sign) is called
+ * for every new game, single or in a session.
+ */
+function runBinaryBot(callable $makePlayer) {
+    $name = null;
+    $player = null;
+    $rows = $cols = 0;
+    $sessions = [];  // session id => [player, rows, cols]
+    while (($frame = botReadFrame(STDIN)) !== null) {
+        [$type, $body] = $frame;
+        switch ($type) {
+            case BOT_INIT:
+                $name = $body;
+                botWriteFrame(STDOUT, BOT_READY);
+                break;
+            case BOT_START_GAME:
+                [$player, $rows, $cols] = botStartGame($makePlayer, $name, $body);
+                break;
+            case BOT_GET_MOVE:
+                botWriteFrame(STDOUT, BOT_MOVE, botGetMove($player, $cols, $body)[0]);
+                break;
+            case BOT_MOVE_RESULT:
+                botHandleMoveResult($player, $body);
+                break;
+            case BOT_END_GAME:
+                botEndGame($player, $body);
+                break;
+            case BOT_OPEN_SESSION:
+                $session = unpack('V', $body)[1];
+                $sessions[$session] = botStartGame($makePlayer, $name, substr($body, 4));
+                break;
+            case BOT_SESSION_RESULT:
+                $session = unpack('V', $body)[1];
+                botHandleMoveResult($sessions[$session][0], substr($body, 4));
+                break;
+            case BOT_CLOSE_SESSION:
+                $session = unpack('V', $body)[1];
+                botEndGame($sessions[$session][0], substr($body, 4));
+                unset($sessions[$session]);
+                break;
+            case BOT_GET_MOVE_BATCH:
+                $count = unpack('v', $body)[1];
+                $offset = 2;
+                $reply = pack('v', $count);
+                for ($i = 0; $i < $count; $i++) {
+                    $session = unpack('V', substr($body, $offset, 4))[1];
+                    [$sessionPlayer, $sessionRows, $sessionCols] = $sessions[$session];
+                    $size = 11 + 2 * $sessionRows * $sessionCols;
+                    [$move, $timeTaken] = botGetMove($sessionPlayer, $sessionCols, substr($body, $offset + 4, $size));
+                    $reply .= pack('Vg', $session, $timeTaken) . $move;
+                    $offset += 4 + $size;
+                }
+                botWriteFrame(STDOUT, BOT_MOVE_BATCH, $reply);
+                break;
+        }
+    }
+}
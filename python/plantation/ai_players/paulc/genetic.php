@@ -607,6 +607,12 @@ class Genetic
     }
 }
 
+if (in_array('--binary', $argv)) {
+    require __DIR__ . '/bot_client.php';
+    runBinaryBot(function ($name, $sign) { return new Genetic($name, $sign); });
+    exit;
+}
+
 #$debug = fopen('debug.log', 'w');
 $name = $sign = null;
 // A simple loop to continuously read from STDIN
@@ -2,6 +2,7 @@ import os
 import subprocess
 import json
 from plantation.player import Player
+from plantation.subprocess_player import SubprocessPlayer
 
 class PHPPlayerWrapper(Player):
 
@@ -69,3 +70,11 @@ class PHPPlayerWrapper(Player):
 
     def __del__(self):
         self.close()
+
+
+class PHPBinaryPlayer(SubprocessPlayer):
+    """ Runs a PHP bot with the binary protocol, see bot_client.php. """
+
+    def __init__(self, name: str, php_file: str):
+        php_script_path = os.path.join(os.path.dirname(__file__), php_file)
+        super().__init__(name, ["php", php_script_path, "--binary"])
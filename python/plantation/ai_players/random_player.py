@@ -1,4 +1,3 @@
-import random
 from typing import Tuple, List, Dict, Optional
 
 import numpy as np
@@ -22,7 +21,8 @@ class RandomPlayer (Player):
                 'spray': 0.2,
                 'bomb': 0.2
             }
-        self.move_probabilities = move_probabilities
+        else:
+            self.move_probabilities = move_probabilities
 
     def get_move(
             self,
@@ -31,27 +31,22 @@ class RandomPlayer (Player):
             moves_remaining: int,
             time_remaining: float,
     ) -> Tuple[str, List[int]]:
-        rows = board.shape[0]
-        cols = board.shape[1]
-
-        zero_tiles = np.argwhere(board == 0)
-        non_zero_tiles = np.argwhere(board != 0)
-        multi_tiles = np.argwhere(np.abs(board) > 1)
+        legal_moves = self.get_legal_moves(board, moves_remaining)
 
         options = []
 
-        if len(non_zero_tiles) > 0:
+        if len(legal_moves.fertilise) > 0:
             if self.move_probabilities.get('fertilise', 0) > 0:
                 options.append('fertilise')
             if self.move_probabilities.get('plant', 0) > 0 \
-                    and len(zero_tiles) > 0:
+                    and len(legal_moves.plant) > 0:
                 options.append('plant')
 
-        if moves_remaining > 1 and len(zero_tiles) > 0:
+        if moves_remaining > 1 and len(legal_moves.bomb) > 0:
             for option in ('spray', 'bomb'):
                 if self.move_probabilities.get(option, 0) > 0:
                     options.append(option)
-            if len(multi_tiles) > 0:
+            if len(legal_moves.colonise_sources) > 0:
                 if self.move_probabilities.get('colonise', 0) > 0:
                     options.append('colonise')
 
@@ -59,38 +54,23 @@ class RandomPlayer (Player):
         if total_prob > 0:
             weights = [self.move_probabilities[k] / total_prob for k in options]
 
-            move = random.choices(options, weights=weights)[0]
+            move = self.rng.choices(options, weights=weights)[0]
             if move == 'fertilise':
-                pos = random.choice(non_zero_tiles)
+                pos = self.rng.choice(legal_moves.fertilise)
                 return move, pos
 
             elif move == 'plant':
-                plant_attempts = 10
-                for i in range(plant_attempts):
-                    plant_options = []
-                    row, col = random.choice(non_zero_tiles)
-                    for dr, dc in [
-                        (0, -1), (0, 1), (1, 0), (-1, 0)
-                    ]:
-                        test_row = row + dr
-                        test_col = col + dc
-                        if 0 <= test_row < rows and 0 <= test_col < cols:
-                            if board[test_row, test_col] == 0:
-                                plant_options.append((test_row, test_col))
-                    if len(plant_options) > 0:
-                        return move, random.choice(plant_options)
-    
+                return move, self.rng.choice(legal_moves.plant)
+
             elif move == 'colonise':
-                source_row, source_col = random.choice(multi_tiles)
-                row, col = random.choice(zero_tiles)
+                source_row, source_col = self.rng.choice(legal_moves.colonise_sources)
+                row, col = self.rng.choice(legal_moves.colonise_targets)
                 return move, [row, col, source_row, source_col]
 
             elif move in ('spray', 'bomb'):
                 # don't target one of our own squares
-                zero_tiles = np.argwhere(board == 0)
-                row, col = random.choice(zero_tiles)
-                if board[row][col] * self.sign == 0:
-                    return move, [row, col]
+                row, col = self.rng.choice(getattr(legal_moves, move))
+                return move, [row, col]
 
             else:
                 print("Unknown move: ", move)
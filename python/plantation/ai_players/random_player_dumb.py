@@ -1,4 +1,3 @@
-import random
 from typing import Tuple, List
 
 import numpy as np
@@ -22,15 +21,15 @@ class RandomPlayerDumb (Player):
             options = ['fertilise', 'plant']
 
         # generate a random number between 0 and num_rows - 1
-        row = random.randint(0, board.shape[0] - 1)
-        col = random.randint(0, board.shape[1] - 1)
+        row = self.rng.randint(0, board.shape[0] - 1)
+        col = self.rng.randint(0, board.shape[1] - 1)
 
         # select a random value from options List
-        move = random.choice(options)
+        move = self.rng.choice(options)
 
         if move == 'colonise':
-            source_row = random.randint(0, board.shape[0] - 1)
-            source_col = random.randint(0, board.shape[1] - 1)
+            source_row = self.rng.randint(0, board.shape[0] - 1)
+            source_col = self.rng.randint(0, board.shape[1] - 1)
 
             return move, [row, col, source_row, source_col]
 
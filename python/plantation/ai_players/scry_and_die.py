@@ -1,18 +1,31 @@
 from itertools import cycle
-import random
 from typing import Tuple, List, Optional
 
 import numpy as np
-from scipy.signal import convolve2d
 
+from plantation.include import RESULT_OK, RESULT_OCCUPIED, cross_sum
+from plantation.move_result import MoveResult
 from plantation.player import Player
 
 
 class ScryAndDie (Player):
+    structured_results = True
     opp_board = None
     turn_scouted = None
     mode = ''
     scry_cycle = None
+
+    # the threat map: estimated opponent tile values for threat_turn, with our
+    # own tiles zeroed, and what a spray on each tile would take. It is built
+    # on the first evaluation of a turn, and the blocks of opp_board that move
+    # results change later in the turn are re-estimated on the next evaluation.
+    threat_turn = None
+    own_tiles = None
+    threat = None
+    spray_scores = None
+    stale_blocks = None
+    evaluation = None
+
     cross_coords = np.array([
         [-1, 0], [0, -1], [0, 0], [0, 1], [1, 0]
     ])
@@ -27,6 +40,8 @@ class ScryAndDie (Player):
         super().start_game(board_shape, sign)
         self.opp_board = np.zeros(board_shape)
         self.turn_scouted = np.zeros(board_shape)
+        self.threat_turn = None
+        self.evaluation = None
 
         # randomly select the cycle for scrying, but start with the opponent's
         # home column as that is most important to scry early to find out where
@@ -39,9 +54,9 @@ class ScryAndDie (Player):
             remaining_cols = [3, 6, 9]
 
         first_col = [(r, opp_home_col) for r in [1, 4, 7, 9]]
-        random.shuffle(first_col)
+        self.rng.shuffle(first_col)
         remaining_board = [(r, c) for c in [1, 3, 6, 9] for r in remaining_cols]
-        random.shuffle(remaining_board)
+        self.rng.shuffle(remaining_board)
         self.scry_cycle = cycle(first_col + remaining_board)
 
     def get_move(
@@ -89,7 +104,7 @@ class ScryAndDie (Player):
                     # from https://stats.stackexchange.com/a/289477
                     grow_prob = 1 / (1 + (grow_prob / (1 - grow_prob))**-3)
 
-                if random.random() < grow_prob:
+                if self.rng.random() < grow_prob:
                     self.mode = 'grow'
                 else:
                     self.mode = 'kill'
@@ -102,29 +117,33 @@ class ScryAndDie (Player):
     def get_best_offensive_move(
             self, board: np.ndarray, turn: int
     ) -> Tuple[float, str, List[int]]:
-        estimated_board = self.opp_board + \
-                          (turn - self.turn_scouted) * 1.5 / 121.
-        estimated_board[board != 0] = 0
-
-        bomb_score = min(np.max(estimated_board), 4)
-
-        spray_board = np.where(estimated_board > 1, 1, estimated_board)
-        spray_kernel = np.array([[0, 1, 0],
-                                 [1, 1, 1],
-                                 [0, 1, 0]])
-
-        spray_scores = convolve2d(spray_board, spray_kernel,
-                                  mode='same', boundary='fill', fillvalue=0)
-        spray_score = np.max(spray_scores)
-        if bomb_score > spray_score:
-            bomb_pos = np.unravel_index(
-                np.argmax(estimated_board), estimated_board.shape)
-
-            return bomb_score, 'bomb', list(bomb_pos)
-        else:   # spray_score >= bomb_score
-            spray_pos = np.unravel_index(
-                np.argmax(spray_scores), spray_scores.shape)
-            return spray_score, 'spray', list(spray_pos)
+        own_tiles = board != 0
+        if turn != self.threat_turn or not np.array_equal(own_tiles, self.own_tiles):
+            self.threat_turn = turn
+            self.own_tiles = own_tiles
+            self.threat = np.where(own_tiles, 0, self.opp_board + (turn - self.turn_scouted) * 1.5 / 121.)
+            self.stale_blocks = []
+            self.evaluation = None
+        elif self.stale_blocks:
+            for block in self.stale_blocks:
+                estimate = self.opp_board[block] + (turn - self.turn_scouted[block]) * 1.5 / 121.
+                self.threat[block] = np.where(own_tiles[block], 0, estimate)
+            self.stale_blocks = []
+            self.evaluation = None
+
+        if self.evaluation is None:
+            self.spray_scores = cross_sum(np.minimum(self.threat, 1))
+            bomb_index = int(self.threat.argmax())
+            spray_index = int(self.spray_scores.argmax())
+            bomb_score = min(self.threat.flat[bomb_index], 4)
+            spray_score = self.spray_scores.flat[spray_index]
+            if bomb_score > spray_score:
+                self.evaluation = bomb_score, 'bomb', divmod(bomb_index, board.shape[1])
+            else:   # spray_score >= bomb_score
+                self.evaluation = spray_score, 'spray', divmod(spray_index, board.shape[1])
+
+        score, move, pos = self.evaluation
+        return score, move, list(pos)
 
     def get_scry_and_die(
             self, board: np.ndarray, turn: int, moves_remaining: int
@@ -143,77 +162,64 @@ class ScryAndDie (Player):
     def get_grow(
             self, board: np.ndarray, moves_remaining: int
     ) -> Tuple[str, List[int]]:
-        zero_tiles = np.argwhere(board == 0)
-        multi_tiles = np.argwhere(np.abs(board) > 1)
+        legal_moves = self.get_legal_moves(board, moves_remaining)
         move_probabilities = {'fertilise': 5}
-        if len(zero_tiles) > 0:
+        if len(legal_moves.plant) > 0:
             move_probabilities['plant'] = 5
-            if moves_remaining > 1 and len(multi_tiles) > 0:
-                move_probabilities['colonise'] = 1
+        if len(legal_moves.colonise_sources) > 0 and len(legal_moves.colonise_targets) > 0:
+            move_probabilities['colonise'] = 1
 
-        move = random.choices(
+        move = self.rng.choices(
             list(move_probabilities.keys()),
             weights=list(move_probabilities.values()))[0]
 
-        rows = board.shape[0]
-        cols = board.shape[1]
-
         # pick a random tile empty tile adjacent to a non-zero tile
         if move == 'plant':
-            non_zero_tiles = np.argwhere(board != 0)
-            row, col = random.choice(non_zero_tiles)
-            plant_options = []
-            for delta_r, delta_c in [(0, -1), (0, 1), (1, 0), (-1, 0)]:
-                test_row = row + delta_r
-                test_col = col + delta_c
-                if 0 <= test_row < rows and 0 <= test_col < cols:
-                    if board[test_row][test_col] == 0:
-                        plant_options.append([test_row, test_col])
-            if len(plant_options) > 0:
-                return move, random.choice(plant_options)
-            else:
-                move = 'fertilise'  # fall back to this option
+            return move, self.rng.choice(legal_moves.plant)
 
         # pick a random non-zero tile to fertilise
         if move == 'fertilise':
-            non_zero_tiles = np.argwhere(board != 0)
-            if len(non_zero_tiles) > 0:
-                return move, random.choice(non_zero_tiles)
+            if len(legal_moves.fertilise) > 0:
+                return move, self.rng.choice(legal_moves.fertilise)
 
         if move == 'colonise':
-            if len(multi_tiles) > 0 and len(zero_tiles) > 0:
-                source_row, source_col = random.choice(multi_tiles)
-                target_row, target_col = random.choice(zero_tiles)
-                return move, [target_row, target_col, source_row, source_col]
+            source_row, source_col = self.rng.choice(legal_moves.colonise_sources)
+            target_row, target_col = self.rng.choice(legal_moves.colonise_targets)
+            return move, [target_row, target_col, source_row, source_col]
 
         # there is nowhere we can move...
         return 'scout', [0, 0]
 
     def handle_move_result(self, move, turn, pos, result):
-        code = result.split(' ')[0]
+        if isinstance(result, str):
+            result = MoveResult.from_string(result)
+        code = result.code
+        changed = None
 
         if move == 'scout':
-            if code == 'OK':
-                vals_str = result.split(' ')[1]
-                vals = np.array([int(n) for n in vals_str.split(',')])
+            if code == RESULT_OK:
+                vals = np.array(result.scout, dtype=int)
                 vals[vals * self.sign > 0] = 0  # only record opponent's squares
                 self.opp_board[pos[0]-1:pos[0]+2, pos[1]-1:pos[1]+2] \
                     = abs(vals.reshape((3, 3)))
                 self.turn_scouted[
                     pos[0]-1:pos[0]+2, pos[1]-1:pos[1]+2
                 ] = turn
+                changed = np.s_[pos[0]-1:pos[0]+2, pos[1]-1:pos[1]+2]
         if move in ('plant', 'colonise'):
-            if code == 'occupied':
-                val = abs(int(result.split(' ')[1]))
+            if code == RESULT_OCCUPIED:
+                val = abs(result.value)
                 self.opp_board[pos[0], pos[1]] = val
                 self.turn_scouted[pos[0], pos[1]] = turn
+                changed = np.s_[pos[0], pos[1]]
 
         if move in ('spray', 'bomb'):
-            if code == 'OK':
+            if code == RESULT_OK:
                 if move == 'bomb':
                     # subtract at most 4
                     val_to_subtract = min(self.opp_board[pos[0], pos[1]], 4)
                     self.opp_board[pos[0], pos[1]] -= val_to_subtract
+                    changed = np.s_[pos[0], pos[1]]
                 else:  # move = 'spray'
                     for row, col in self.cross_coords + [pos[0], pos[1]]:
                         if 0 <= row < self.opp_board.shape[0] and \
@@ -221,3 +227,8 @@ class ScryAndDie (Player):
                             # subtract at most 1
                             val_to_subtract = min(self.opp_board[row, col], 1)
                             self.opp_board[row, col] -= val_to_subtract
+                    changed = np.s_[max(pos[0]-1, 0):pos[0]+2, max(pos[1]-1, 0):pos[1]+2]
+
+        # keep this turn's threat map in step; a new turn rebuilds it anyway
+        if changed is not None and turn == self.threat_turn:
+            self.stale_blocks.append(changed)
@@ -0,0 +1,99 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from plantation.async_player import AsyncPlayer
+from plantation.engine import Engine
+from plantation.include import SeedLike, child_seed
+from plantation.player import Player
+
+
+class AsyncEngine(Engine):
+    """ An Engine whose games are coroutines, so that many games can share one
+    event loop while their players think in other processes.
+
+    run_game, run_player_turn and run_player_move are coroutines here. Players
+    can be AsyncPlayers or ordinary Players; ordinary players run inline and
+    hold up the loop while they think. Each concurrent game needs its own
+    engine and its own players.
+    """
+
+    output = None
+
+    async def run_game(
+            self,
+            player_handler_p: Player,
+            player_handler_m: Player,
+            seed: Optional[SeedLike] = None
+    ) -> float:
+        try:
+            self.prepare_game(player_handler_p, player_handler_m, seed)
+
+            time_p = self.starting_seconds
+            time_m = self.starting_seconds
+            for self.turn in range(1, self.max_turns+1):
+                self.start_turn()
+                time_p = self.clock_after_turn(time_p, await self.run_player_turn(1, player_handler_p, time_p))
+                if time_p < 0:
+                    break
+                time_m = self.clock_after_turn(time_m, await self.run_player_turn(-1, player_handler_m, time_m))
+                if time_m < 0:
+                    break
+
+            return self.finish_game(player_handler_p, player_handler_m, time_p, time_m)
+        finally:
+            for player_handler in (player_handler_p, player_handler_m):
+                if isinstance(player_handler, AsyncPlayer):
+                    player_handler.game_over()
+
+    async def run_player_turn(
+            self,
+            sign: int,
+            player_handler: Player,
+            time_remaining: float
+    ) -> float:
+        self.start_player_turn(sign, player_handler, time_remaining)
+
+        moves_remaining = 3
+        total_turn_time = 0.
+        while moves_remaining > 0:
+            time_taken, moves_taken = await self.run_player_move(player_handler, time_remaining, moves_remaining, sign)
+            total_turn_time += time_taken
+            moves_remaining -= moves_taken
+        self.at_end_of_turn_action(sign)
+        return total_turn_time
+
+    async def run_player_move(
+            self,
+            player_handler: Player,
+            time_remaining: float,
+            moves_remaining: int,
+            sign: int
+    ) -> Tuple[float, int]:
+        if not isinstance(player_handler, AsyncPlayer):
+            return super().run_player_move(player_handler, time_remaining, moves_remaining, sign)
+
+        move, pos, time_taken = await player_handler.timed_get_move(
+            self.board_for_player(player_handler, sign), self.turn, moves_remaining, time_remaining
+        )
+        return time_taken, self.apply_player_move(player_handler, move, pos, sign, moves_remaining)
+
+
+async def run_games(
+        games: List[Tuple[Player, Player]],
+        engine_kwargs: Dict,
+        max_concurrent: Optional[int] = None,
+        seed: Optional[SeedLike] = None
+) -> List[float]:
+    """ Plays (player_p, player_m) games concurrently, each on its own AsyncEngine,
+    and returns their scores in order. A player can only be in one of the games. """
+    semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+    async def play(game: int, player_p: Player, player_m: Player) -> float:
+        engine = AsyncEngine(**engine_kwargs)
+        game_seed = child_seed(seed, game) if seed is not None else None
+        if semaphore is None:
+            return await engine.run_game(player_p, player_m, game_seed)
+        async with semaphore:
+            return await engine.run_game(player_p, player_m, game_seed)
+
+    return await asyncio.gather(*(play(game, p, m) for game, (p, m) in enumerate(games)))
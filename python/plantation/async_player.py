@@ -0,0 +1,158 @@
+import asyncio
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from plantation import bot_protocol as protocol
+from plantation.move_result import MoveResult
+from plantation.player import Player
+
+
+class AsyncPlayer(Player):
+    """ A player whose get_move is a coroutine, for AsyncEngine.
+
+    The other methods stay plain functions: they are notifications that
+    should return straight away. timed_get_move also reports how long the
+    player took, which is what is charged to its clock.
+    """
+
+    async def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+
+        return "", []
+
+    async def timed_get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int], float]:
+        start_time = time.perf_counter()
+        move, pos = await self.get_move(board, turn, moves_remaining, time_remaining)
+        return move, pos, time.perf_counter() - start_time
+
+    def game_over(self):
+        """ Called by AsyncEngine however a game ends: after end_game, or
+        without it when a player runs out of time or the game fails. """
+        pass
+
+
+class BotConnection(asyncio.SubprocessProtocol):
+    """ Splits a bot's stdout into frames, stamped with the time they arrived.
+
+    The time is taken when the event loop reads the data off the pipe, so it
+    leaves out the wait for the game's coroutine to be scheduled again. The
+    read is itself a loop callback, though, so CPU work from other games on
+    the same loop can still delay the stamp, and that delay is charged to the
+    bot.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        # (arrival time, message type, body), with a message type of None once
+        # the bot's stdout closes
+        self.frames = asyncio.Queue()
+
+    def pipe_data_received(self, fd: int, data: bytes):
+        arrival_time = time.perf_counter()
+        self.buffer += data
+        for msg_type, body in protocol.split_frames(self.buffer):
+            self.frames.put_nowait((arrival_time, msg_type, body))
+
+    def pipe_connection_lost(self, fd: int, exc: Optional[Exception]):
+        # process_exited can come before the last of the bot's output has been
+        # read, so the end of the bot is taken from its stdout closing instead
+        if fd == 1:
+            self.frames.put_nowait((time.perf_counter(), None, b''))
+
+
+class AsyncSubprocessPlayer(AsyncPlayer):
+    """ The asyncio version of SubprocessPlayer, using the same protocol.
+
+    Call `await player.start()` inside the event loop before the game.
+    """
+
+    structured_results = True
+    transport = None
+
+    def __init__(self, name: str, command: List[str], cwd: Optional[str] = None):
+        super().__init__(name)
+        self.command = command
+        self.cwd = cwd
+        self.connection = None
+        self.stdin = None
+
+    async def start(self) -> 'AsyncSubprocessPlayer':
+        loop = asyncio.get_running_loop()
+        self.transport, self.connection = await loop.subprocess_exec(
+            BotConnection, *self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=None, cwd=self.cwd
+        )
+        self.stdin = self.transport.get_pipe_transport(0)
+        self.send(protocol.INIT, self.name.encode())
+        await self.receive(protocol.READY, "start-up")
+        return self
+
+    def send(self, msg_type: int, body: bytes = b'') -> None:
+        protocol.write_frame(self.stdin, msg_type, body)
+
+    async def receive(self, expected_type: int, during: str) -> Tuple[float, bytes]:
+        arrival_time, msg_type, body = await self.connection.frames.get()
+        if msg_type is None:
+            raise EOFError(f"{self.name} exited during {during}")
+        if msg_type != expected_type:
+            raise ValueError(f"{self.name} sent message type {msg_type} during {during}")
+        return arrival_time, body
+
+    def start_game(self, board_shape: Tuple[int], sign: int):
+        super().start_game(board_shape, sign)
+        self.send(protocol.START_GAME, protocol.START_GAME_BODY.pack(sign, board_shape[0], board_shape[1]))
+
+    async def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+        move, pos, _time_taken = await self.timed_get_move(board, turn, moves_remaining, time_remaining)
+        return move, pos
+
+    async def timed_get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int], float]:
+        self.send(protocol.GET_MOVE, protocol.pack_get_move(board, turn, moves_remaining, time_remaining))
+        sent_time = time.perf_counter()
+        arrival_time, body = await self.receive(protocol.MOVE, "get_move")
+        move, pos = protocol.unpack_move(body)
+        return move, pos, arrival_time - sent_time
+
+    def handle_move_result(self, move: str, turn: int, pos: List[int], result: MoveResult):
+        self.send(protocol.MOVE_RESULT, protocol.pack_move_result(move, turn, pos, result))
+
+    def end_game(self, your_score: int, opponent_score: int):
+        self.send(protocol.END_GAME, protocol.END_GAME_BODY.pack(int(your_score), int(opponent_score)))
+
+    async def close(self, timeout: float = 5.0):
+        """ Closes the bot's stdin, so it can finish up, and waits for it to exit. """
+        if self.transport is None:
+            return
+        self.stdin.close()
+        try:
+            while (await asyncio.wait_for(self.connection.frames.get(), timeout))[1] is not None:
+                pass
+        except asyncio.TimeoutError:
+            self.transport.kill()
+        self.transport.close()
+        self.transport = None
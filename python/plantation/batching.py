@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+
+def shuffled_batches(
+        blocks: Iterable[Dict[str, np.ndarray]],
+        batch_size: int,
+        shuffle_buffer: int = 1 << 15,
+        rng: Optional[np.random.Generator] = None,
+        drop_last: bool = True
+) -> Iterator[Dict[str, np.ndarray]]:
+    """ Fixed-size minibatches drawn at random from a stream of blocks of records.
+
+    Each block is a dict of arrays with records along the first axis. Blocks
+    are copied into a buffer of shuffle_buffer records, and each batch is drawn
+    at random from the buffer, so memory use is bounded by the buffer however
+    long the stream is. What is left in the buffer at the end of the stream is
+    yielded in random order.
+    """
+    rng = np.random.default_rng(rng)
+    capacity = max(shuffle_buffer, batch_size)
+    buffer = None
+    size = 0
+
+    for block in blocks:
+        if buffer is None:
+            buffer = {k: np.empty((capacity, ) + v.shape[1:], dtype=v.dtype) for k, v in block.items()}
+        num_records = len(next(iter(block.values())))
+        copied = 0
+        while copied < num_records:
+            count = min(capacity - size, num_records - copied)
+            for k, v in buffer.items():
+                v[size:size + count] = block[k][copied:copied + count]
+            size += count
+            copied += count
+            if size == capacity:
+                slots = rng.choice(capacity, batch_size, replace=False)
+                yield {k: v[slots] for k, v in buffer.items()}
+                # fill the taken slots from the end of the buffer
+                tail = np.arange(capacity - batch_size, capacity)
+                holes = slots[slots < capacity - batch_size]
+                movers = tail[~np.isin(tail, slots)]
+                for v in buffer.values():
+                    v[holes] = v[movers]
+                size = capacity - batch_size
+
+    if buffer is None:
+        return
+    order = rng.permutation(size)
+    for start in range(0, size, batch_size):
+        slots = order[start:start + batch_size]
+        if len(slots) < batch_size and drop_last:
+            break
+        yield {k: v[slots] for k, v in buffer.items()}
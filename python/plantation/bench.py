@@ -0,0 +1,273 @@
+""" Benchmarks for the engine, the bots and the I/O paths, with results as JSON.
+
+    python scripts/benchmark.py [engine moves board players board_stats ipc] [--quick] [--output FILE]
+
+Each benchmark returns a dict of timings. Times are best-of-repeats where
+that makes sense, so they track the code rather than noise on the machine.
+"""
+from datetime import datetime, timezone
+from functools import partial
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from plantation.engine import Engine
+from plantation.game_state import GameState
+from plantation.include import display_board_text, get_player_restricted_board
+from plantation.legal_moves import compute_legal_moves
+from plantation.player import Player
+
+ENGINE_KWARGS = dict(
+    num_rows=11,
+    num_cols=11,
+    max_turns=100,
+    starting_tiles=3,
+    starting_seconds=1000.0,
+    time_increment=1.0
+)
+
+
+class ScriptedPlayer(Player):
+    """ Plays a fixed, cheap sequence of moves, so timings are all engine. """
+
+    def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+        if moves_remaining == 3:
+            return 'plant', [turn % 11, 1 if self.sign > 0 else 9]
+        elif moves_remaining == 2:
+            return 'fertilise', [0, 0]
+        return 'scout', [5, 5]
+
+
+def best_time(fn: Callable, number: int, repeat: int = 5) -> float:
+    """ Seconds per call of fn, best of repeat runs of number calls. """
+    return min(timeit.Timer(fn).repeat(repeat, number)) / number
+
+
+def summarise_latencies(latencies: List[float]) -> Dict[str, float]:
+    latencies = np.array(latencies) * 1e6
+    return {
+        'calls': len(latencies),
+        'mean_us': float(latencies.mean()),
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p99_us': float(np.percentile(latencies, 99)),
+        'max_us': float(latencies.max()),
+    }
+
+
+def mid_game_board(turns: int = 30, seed: int = 0) -> np.ndarray:
+    """ The board after some turns of two ScryAndDie players. """
+    from plantation.ai_players.scry_and_die import ScryAndDie
+
+    engine = Engine(**dict(ENGINE_KWARGS, max_turns=turns))
+    engine.output = None
+    engine.run_game(ScryAndDie(name="a"), ScryAndDie(name="b"), seed=seed)
+    return engine.board.copy()
+
+
+def games_per_second(engine: Engine, make_players: Callable, num_games: int) -> float:
+    start_time = time.perf_counter()
+    for game in range(num_games):
+        engine.run_game(*make_players(), seed=game)
+    return num_games / (time.perf_counter() - start_time)
+
+
+def bench_engine(quick: bool = False) -> Dict:
+    """ Whole games between scripted players, headless and with the text log. """
+    num_games = 20 if quick else 200
+    make_players = lambda: (ScriptedPlayer(name="a"), ScriptedPlayer(name="b"))
+    results = {'games': num_games}
+
+    engine = Engine(**ENGINE_KWARGS)
+    engine.output = None
+    results['headless_games_per_sec'] = games_per_second(engine, make_players, num_games)
+
+    engine = Engine(**ENGINE_KWARGS)
+    engine.output = os.devnull
+    results['logged_games_per_sec'] = games_per_second(engine, make_players, max(num_games // 10, 1))
+
+    engine = Engine(**ENGINE_KWARGS)
+    engine.output = None
+    engine.use_bitboards = True
+    results['bitboard_games_per_sec'] = games_per_second(engine, make_players, num_games)
+    return results
+
+
+def bench_moves(quick: bool = False) -> Dict:
+    """ Each move type on a mid-game board, timed as GameState apply plus undo,
+    so the board is the same for every call. """
+    board = mid_game_board()
+    state = GameState(board.copy(), max_turns=1000)
+    legal_moves = compute_legal_moves(get_player_restricted_board(board, 1), 3)
+    first = lambda tiles: [int(x) for x in tiles[0]]
+    opp = first(np.argwhere(board < 0))
+    moves = {
+        'fertilise': first(legal_moves.fertilise),
+        'plant': first(legal_moves.plant),
+        'scout': [5, 5],
+        'colonise': first(np.argwhere(board == 0)) + first(legal_moves.colonise_sources),
+        'spray': opp,
+        'bomb': opp,
+    }
+
+    number = 2000 if quick else 20000
+    results = {}
+    for move, pos in moves.items():
+        def apply_undo(move=move, pos=pos):
+            state.apply(move, pos)
+            state.undo()
+        results[f'{move}_us'] = best_time(apply_undo, number) * 1e6
+    results['do_move_error_us'] = best_time(lambda: state.do_move('fertilise', [-1, -1], 1, 3), number) * 1e6
+    return results
+
+
+def bench_board(quick: bool = False) -> Dict:
+    """ The board helpers used on every move and every logged turn. """
+    board = mid_game_board()
+    number = 5000 if quick else 50000
+    return {
+        'get_player_restricted_board_us': best_time(lambda: get_player_restricted_board(board, 1), number) * 1e6,
+        'display_board_text_us': best_time(lambda: display_board_text(board), max(number // 100, 10)) * 1e6,
+    }
+
+
+def time_decisions(player: Player, opponent: Player, num_games: int) -> Dict:
+    latencies = []
+    get_move = player.get_move
+
+    def timed_get_move(*args):
+        start_time = time.perf_counter()
+        move = get_move(*args)
+        latencies.append(time.perf_counter() - start_time)
+        return move
+
+    player.get_move = timed_get_move
+    engine = Engine(**ENGINE_KWARGS)
+    engine.output = None
+    for game in range(num_games):
+        engine.run_game(player, opponent, seed=game)
+    return summarise_latencies(latencies)
+
+
+def bench_players(quick: bool = False) -> Dict:
+    """ get_move latency of the example bots over whole games. """
+    from plantation.ai_players.random_player import RandomPlayer
+    from plantation.ai_players.scry_and_die import ScryAndDie
+
+    num_games = 2 if quick else 10
+    make_random = partial(
+        RandomPlayer,
+        move_probabilities={'fertilise': 3, 'plant': 4, 'colonise': 2, 'spray': 2, 'bomb': 1},
+        name="random"
+    )
+    return {
+        'scry_and_die': time_decisions(ScryAndDie(name="scry"), ScryAndDie(name="opponent"), num_games),
+        'random_player': time_decisions(make_random(), ScryAndDie(name="opponent"), num_games),
+    }
+
+
+def bench_board_stats(quick: bool = False) -> Dict:
+    """ What collecting BoardStats adds to a game between ScryAndDie players. """
+    from plantation.ai_players.scry_and_die import ScryAndDie
+    from plantation.martin.board_stats import BoardStats, BoardStatsWriter
+    from plantation.martin.board_stats_engine import BoardStatsEngine
+
+    num_games = 5 if quick else 30
+    make_players = lambda: (ScryAndDie(name="a"), ScryAndDie(name="b"))
+
+    engine = Engine(**ENGINE_KWARGS)
+    engine.output = None
+    plain = games_per_second(engine, make_players, num_games)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        with BoardStatsWriter(os.path.join(out_dir, 'bench.h5')) as writer:
+            engine = BoardStatsEngine(BoardStats(ENGINE_KWARGS['max_turns'], writer), **ENGINE_KWARGS)
+            engine.output = None
+            collecting = games_per_second(engine, make_players, num_games)
+        file_size = os.path.getsize(os.path.join(out_dir, 'bench.h5'))
+
+    return {
+        'games': num_games,
+        'plain_games_per_sec': plain,
+        'collecting_games_per_sec': collecting,
+        'overhead_ms_per_game': (1 / collecting - 1 / plain) * 1e3,
+        'bytes_per_game': file_size / num_games,
+    }
+
+
+def bench_ipc(quick: bool = False) -> Dict:
+    """ get_move round trip to a Python bot in another process, over the binary protocol. """
+    from plantation.subprocess_player import SubprocessPlayer
+
+    command = [sys.executable, '-m', 'plantation.bot_client', 'plantation.bench:ScriptedPlayer']
+    player = SubprocessPlayer("ipc", command)
+    start_time = time.perf_counter()
+    player.start_game((11, 11), 1)
+    startup = time.perf_counter() - start_time
+
+    board = mid_game_board()
+    number = 500 if quick else 5000
+    latencies = []
+    for i in range(number):
+        start_time = time.perf_counter()
+        player.get_move(board, i % 100 + 1, 3, 100.)
+        latencies.append(time.perf_counter() - start_time)
+    player.close()
+
+    results = {'startup_ms': startup * 1e3}
+    results.update(summarise_latencies(latencies))
+    return results
+
+
+BENCHMARKS = {
+    'engine': bench_engine,
+    'moves': bench_moves,
+    'board': bench_board,
+    'players': bench_players,
+    'board_stats': bench_board_stats,
+    'ipc': bench_ipc,
+}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None, quick: bool = False) -> Dict:
+    """ Runs the named benchmarks (all of them by default). A benchmark that
+    cannot run here, e.g. for a missing optional dependency, is reported with
+    an error rather than stopping the rest. """
+    results = {'environment': environment(), 'quick': quick, 'benchmarks': {}}
+    for name in names or BENCHMARKS.keys():
+        try:
+            results['benchmarks'][name] = BENCHMARKS[name](quick)
+        except ImportError as e:
+            results['benchmarks'][name] = {'error': str(e)}
+    return results
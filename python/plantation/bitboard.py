@@ -0,0 +1,122 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+class BitBoard:
+    """ One player's tiles as integer bit masks, with tile (row, col) at bit
+    row * num_cols + col.
+
+    `owned` has a bit set for every tile the player holds, and `multi` for
+    every tile with a score of 2 or more. Masks are plain Python ints, so
+    adjacency is a handful of shifts and counts are int.bit_count().
+    """
+
+    # masks that only depend on the board shape, shared between instances
+    _geometry = {}
+
+    def __init__(self, num_rows: int = 11, num_cols: int = 11):
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.owned = 0
+        self.multi = 0
+
+        if (num_rows, num_cols) not in self._geometry:
+            self._geometry[num_rows, num_cols] = self.make_geometry(num_rows, num_cols)
+        self.full, self.not_left_col, self.not_right_col, self.neighbour_masks, self.cross_masks \
+            = self._geometry[num_rows, num_cols]
+
+    @staticmethod
+    def make_geometry(num_rows: int, num_cols: int) -> tuple:
+        """ full, not_left_col, not_right_col, neighbour_masks and cross_masks
+        for a board of the given shape. """
+        num_tiles = num_rows * num_cols
+        full = (1 << num_tiles) - 1
+        left_col = sum(1 << (row * num_cols) for row in range(num_rows))
+        not_left_col = full & ~left_col
+        not_right_col = full & ~(left_col << (num_cols - 1))
+
+        # per-tile masks of the four neighbours, and of the spray cross
+        neighbour_masks = [
+            sum(
+                1 << (r * num_cols + c)
+                for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                if 0 <= r < num_rows and 0 <= c < num_cols
+            )
+            for row in range(num_rows)
+            for col in range(num_cols)
+        ]
+        cross_masks = [mask | (1 << i) for i, mask in enumerate(neighbour_masks)]
+        return full, not_left_col, not_right_col, neighbour_masks, cross_masks
+
+    @classmethod
+    def from_board(cls, board: np.ndarray, sign: int) -> 'BitBoard':
+        bitboard = cls(board.shape[0], board.shape[1])
+        scores = (board * sign).ravel()
+        for i in np.flatnonzero(scores > 0):
+            bitboard.owned |= 1 << int(i)
+        for i in np.flatnonzero(scores > 1):
+            bitboard.multi |= 1 << int(i)
+        return bitboard
+
+    def bit(self, row: int, col: int) -> int:
+        return 1 << int(row * self.num_cols + col)
+
+    def set_score(self, row: int, col: int, score: int) -> None:
+        """ Updates the masks for one tile; score is from this player's side,
+        so anything below 1 means the tile is not held. """
+        bit = 1 << int(row * self.num_cols + col)
+        if score >= 1:
+            self.owned |= bit
+        else:
+            self.owned &= ~bit
+        if score >= 2:
+            self.multi |= bit
+        else:
+            self.multi &= ~bit
+
+    def neighbours(self, mask: int) -> int:
+        """ Tiles 4-adjacent to any tile in the mask. """
+        cols = self.num_cols
+        return (
+            (mask << cols)
+            | (mask >> cols)
+            | ((mask & self.not_right_col) << 1)
+            | ((mask & self.not_left_col) >> 1)
+        ) & self.full
+
+    def my_tiles(self) -> int:
+        return self.owned
+
+    def multi_tiles(self) -> int:
+        return self.multi
+
+    def plantable_tiles(self) -> int:
+        """ Tiles adjacent to the player's tiles that the player does not hold.
+        Some may belong to the opponent, in which case planting is "occupied". """
+        return self.neighbours(self.owned) & ~self.owned
+
+    def cross(self, row: int, col: int) -> int:
+        return self.cross_masks[row * self.num_cols + col]
+
+    def is_adjacent(self, row: int, col: int) -> bool:
+        return (self.neighbour_masks[row * self.num_cols + col] & self.owned) != 0
+
+    def tile_count(self) -> int:
+        return self.owned.bit_count()
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return mask.bit_count()
+
+    def to_coords(self, mask: int) -> np.ndarray:
+        """ The (row, col) of every tile in the mask, like np.argwhere. """
+        return np.array(self.to_list(mask), dtype=int).reshape(-1, 2)
+
+    def to_list(self, mask: int) -> List[Tuple[int, int]]:
+        coords = []
+        while mask:
+            low_bit = mask & -mask
+            coords.append(divmod(low_bit.bit_length() - 1, self.num_cols))
+            mask ^= low_bit
+        return coords
@@ -0,0 +1,117 @@
+""" Reference client for the bot protocol: serves a Python Player over stdin and stdout.
+
+    python -m plantation.bot_client plantation.ai_players.scry_and_die:ScryAndDie
+    python -m plantation.bot_client scry-and-die
+
+The player is given as module:class or as a bot name from plantation.registry,
+and is built with name= the name from the INIT message, and for a bot name
+also with the bot's BOT_DEFAULTS.
+"""
+import importlib
+import sys
+import time
+from typing import BinaryIO, Callable, Dict, List, Tuple
+
+from plantation import bot_protocol as protocol
+from plantation.player import Player
+from plantation.registry import BotFactory
+
+
+def serve(player_factory: Callable[[str], Player], stdin: BinaryIO, stdout: BinaryIO) -> None:
+    """ Answers messages until the engine closes stdin.
+
+    The single-game messages go to one player, made at INIT. Each session
+    gets a player of its own, made when the session opens.
+    """
+    name = None
+    player = None
+    board_shape = None
+    sessions: Dict[int, Player] = {}
+    session_shapes: Dict[int, Tuple[int, int]] = {}
+    while True:
+        frame = protocol.read_frame(stdin)
+        if frame is None:
+            break
+        msg_type, body = frame
+
+        if msg_type == protocol.INIT:
+            name = body.decode()
+            player = player_factory(name)
+            protocol.write_frame(stdout, protocol.READY)
+            stdout.flush()
+
+        elif msg_type == protocol.START_GAME:
+            board_shape = start_game(player, body)
+
+        elif msg_type == protocol.GET_MOVE:
+            move, pos, _time_taken = get_move(player, body, board_shape)
+            protocol.write_frame(stdout, protocol.MOVE, protocol.pack_move(move, pos))
+            stdout.flush()
+
+        elif msg_type == protocol.MOVE_RESULT:
+            handle_move_result(player, body)
+
+        elif msg_type == protocol.END_GAME:
+            end_game(player, body)
+
+        elif msg_type == protocol.OPEN_SESSION:
+            session = protocol.SESSION.unpack_from(body)[0]
+            sessions[session] = player_factory(name)
+            session_shapes[session] = start_game(sessions[session], body[protocol.SESSION.size:])
+
+        elif msg_type == protocol.SESSION_RESULT:
+            session = protocol.SESSION.unpack_from(body)[0]
+            handle_move_result(sessions[session], body[protocol.SESSION.size:])
+
+        elif msg_type == protocol.CLOSE_SESSION:
+            session = protocol.SESSION.unpack_from(body)[0]
+            end_game(sessions.pop(session), body[protocol.SESSION.size:])
+            del session_shapes[session]
+
+        elif msg_type == protocol.GET_MOVE_BATCH:
+            moves = []
+            for session, request in protocol.unpack_get_move_batch(body, session_shapes):
+                move, pos, time_taken = get_move(sessions[session], request, session_shapes[session])
+                moves.append((session, time_taken, move, pos))
+            protocol.write_frame(stdout, protocol.MOVE_BATCH, protocol.pack_move_batch(moves))
+            stdout.flush()
+
+
+def start_game(player: Player, body: bytes) -> Tuple[int, int]:
+    sign, num_rows, num_cols = protocol.START_GAME_BODY.unpack(body)
+    player.start_game((num_rows, num_cols), sign)
+    return num_rows, num_cols
+
+
+def get_move(player: Player, body: bytes, board_shape: Tuple[int, int]) -> Tuple[str, List[int], float]:
+    start_time = time.perf_counter()
+    board, turn, moves_remaining, time_remaining = protocol.unpack_get_move(body, board_shape)
+    move, pos = player.get_move(board, turn, moves_remaining, time_remaining)
+    return move, pos, time.perf_counter() - start_time
+
+
+def handle_move_result(player: Player, body: bytes) -> None:
+    move, turn, pos, result = protocol.unpack_move_result(body)
+    player.handle_move_result(move, turn, pos, result if player.structured_results else str(result))
+
+
+def end_game(player: Player, body: bytes) -> None:
+    your_score, opponent_score = protocol.END_GAME_BODY.unpack(body)
+    player.end_game(your_score, opponent_score)
+
+
+def main():
+    if ':' in sys.argv[1]:
+        module_name, class_name = sys.argv[1].split(':')
+        player_class = getattr(importlib.import_module(module_name), class_name)
+        player_factory = lambda name: player_class(name=name)
+    else:
+        player_factory = lambda name: BotFactory(sys.argv[1], name=name)()
+    stdout = sys.stdout.buffer
+    # anything the player prints goes to stderr, out of the way of the protocol
+    sys.stdout = sys.stderr
+    serve(player_factory, sys.stdin.buffer, stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+import subprocess
+import threading
+from typing import Callable, Iterator, List, Optional
+
+from plantation.player import Player
+from plantation.subprocess_player import SubprocessPlayer
+
+
+class BotPool:
+    """ Warm processes for one kind of subprocess bot, leased to one game at a time.
+
+    The pool starts `size` bots up front, and launches more as they are leased
+    so that there are always `spares` started and waiting. A returned bot is
+    reused: start_game resets it for the next game. Bots that have crashed,
+    that were in a game that failed, or that have played `max_games` games
+    are closed and replaced.
+
+    A pool can be used as a player factory: calling it leases a bot, and
+    release_player gives it back. Pickling a pool only copies its settings,
+    so a pool passed to worker processes starts its own bots in each worker,
+    on first use.
+    """
+
+    def __init__(
+            self,
+            factory: Callable[[], SubprocessPlayer],
+            size: int = 2,
+            spares: int = 1,
+            max_games: Optional[int] = None
+    ):
+        self.factory = factory
+        self.size = size
+        self.spares = spares
+        self.max_games = max_games
+        self.idle: List[SubprocessPlayer] = []
+        self.leased: List[SubprocessPlayer] = []
+        self.lock = threading.Lock()
+        self.started = False
+
+    def __getstate__(self) -> dict:
+        return {'factory': self.factory, 'size': self.size, 'spares': self.spares, 'max_games': self.max_games}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def launch(self) -> SubprocessPlayer:
+        bot = self.factory()
+        bot.pool = self
+        bot.games_played = 0
+        return bot
+
+    def top_up(self) -> None:
+        if not self.started:
+            self.idle.extend(self.launch() for _i in range(self.size))
+            self.started = True
+        while len(self.idle) < max(self.spares, self.size - len(self.leased)):
+            self.idle.append(self.launch())
+
+    def lease(self) -> SubprocessPlayer:
+        with self.lock:
+            self.top_up()
+            bot = self.idle.pop(0)
+            while not bot.is_alive():
+                bot.close()
+                bot = self.idle.pop(0) if self.idle else self.launch()
+            self.leased.append(bot)
+            self.top_up()
+            return bot
+
+    __call__ = lease
+
+    def release(self, bot: SubprocessPlayer, failed: bool = False) -> None:
+        """ Returns a bot after a game. Pass failed=True if the game did not
+        finish cleanly, as the bot may be part way through a message. """
+        with self.lock:
+            self.leased.remove(bot)
+            bot.games_played += 1
+            worn_out = self.max_games is not None and bot.games_played >= self.max_games
+            if failed or worn_out or not bot.is_alive():
+                bot.close()
+            else:
+                self.idle.append(bot)
+            self.top_up()
+
+    @contextmanager
+    def leased_bot(self) -> Iterator[SubprocessPlayer]:
+        bot = self.lease()
+        try:
+            yield bot
+        except BaseException:
+            self.release(bot, failed=True)
+            raise
+        self.release(bot)
+
+    def close(self) -> None:
+        with self.lock:
+            for bot in self.idle + self.leased:
+                bot.close()
+            self.idle = []
+            self.leased = []
+            self.started = False
+
+    def __enter__(self) -> 'BotPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def release_player(player: Player, failed: bool = False) -> None:
+    """ Gives a player back to its BotPool, if it came from one. """
+    pool = getattr(player, 'pool', None)
+    if pool is not None:
+        pool.release(player, failed)
+
+
+def has_crashed(player: Player, timeout: float = 1.0) -> bool:
+    """ Whether a subprocess player's process has exited, giving it a moment
+    to do so. For use after a game failed. """
+    if not isinstance(player, SubprocessPlayer) or player.process is None:
+        return False
+    try:
+        player.process.wait(timeout)
+        return True
+    except subprocess.TimeoutExpired:
+        return False
@@ -0,0 +1,204 @@
+""" Binary protocol between the engine and bots running in another process.
+
+Every message is a frame: a little-endian u32 length, then that many bytes,
+the first of which is the message type. All integers are little-endian.
+
+Engine to bot:
+
+- INIT: the player name, utf-8. The bot must reply with READY once it has
+  started up. The engine waits for this before the game starts, so start-up
+  time is not charged to the first move.
+- START_GAME: sign (i8), rows, cols (u8).
+- GET_MOVE: turn (u16), moves remaining (u8), time remaining (f64), then the
+  player's board as rows * cols i16 in row-major order. The bot must reply
+  with a MOVE frame.
+- MOVE_RESULT: move code (u8, as include.MOVES), turn (u16), row, col,
+  source row, source col (i8, -128 where absent), result code (u8, as
+  include.RESULT_*), whether there is a value (u8), value (i16), number of
+  scouted tiles (u8), then the scouted tiles (i16 each).
+- END_GAME: your score, opponent score (i32).
+
+A bot can also host many games at once, each in its own session with a u32
+session id chosen by the engine:
+
+- OPEN_SESSION: session id, then a START_GAME body. This starts a new game
+  state, replacing any the session had.
+- SESSION_RESULT: session id, then a MOVE_RESULT body.
+- CLOSE_SESSION: session id, then an END_GAME body. The session is dropped.
+- GET_MOVE_BATCH: number of requests (u16), then for each a session id and a
+  GET_MOVE body. The bot must reply with a MOVE_BATCH frame covering all of them.
+
+Bot to engine:
+
+- READY: empty.
+- MOVE: move code (u8, 255 for no move), row, col, source row, source col (i8).
+- MOVE_BATCH: number of moves (u16), then for each a session id, the seconds
+  spent working it out (f32), and a MOVE body.
+
+MOVE_RESULT, START_GAME, END_GAME and the session messages other than
+GET_MOVE_BATCH are notifications: the bot does not reply to them, so the engine
+can queue them up and send them together with the next request.
+
+Boards use i16, not i8, because fertilising has no upper limit on a tile.
+"""
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from plantation.include import MOVES, MOVE_CODES, NO_COORD, encode_pos
+from plantation.move_result import MoveResult
+
+INIT = 0x01
+START_GAME = 0x02
+GET_MOVE = 0x03
+MOVE_RESULT = 0x04
+END_GAME = 0x05
+OPEN_SESSION = 0x06
+SESSION_RESULT = 0x07
+CLOSE_SESSION = 0x08
+GET_MOVE_BATCH = 0x09
+MOVE = 0x81
+READY = 0x82
+MOVE_BATCH = 0x83
+
+NO_MOVE = 0xFF
+
+FRAME_HEADER = struct.Struct('<I')
+START_GAME_BODY = struct.Struct('<bBB')
+GET_MOVE_BODY = struct.Struct('<HBd')
+MOVE_RESULT_BODY = struct.Struct('<BHbbbbBBhB')
+END_GAME_BODY = struct.Struct('<ii')
+MOVE_BODY = struct.Struct('<Bbbbb')
+SESSION = struct.Struct('<I')
+COUNT = struct.Struct('<H')
+MOVE_BATCH_ENTRY = struct.Struct('<If')
+
+BOARD_DTYPE = np.dtype('<i2')
+
+
+def write_frame(stream: BinaryIO, msg_type: int, body: bytes = b'') -> None:
+    stream.write(FRAME_HEADER.pack(len(body) + 1) + bytes([msg_type]) + body)
+
+
+def read_exactly(stream: BinaryIO, size: int) -> Optional[bytes]:
+    data = stream.read(size)
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_frame(stream: BinaryIO) -> Optional[Tuple[int, bytes]]:
+    """ The next (message type, body), or None at end of stream. """
+    header = read_exactly(stream, FRAME_HEADER.size)
+    if header is None:
+        return None
+    payload = read_exactly(stream, FRAME_HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return payload[0], payload[1:]
+
+
+def split_frames(buffer: bytearray) -> List[Tuple[int, bytes]]:
+    """ Removes every complete frame from the front of the buffer. """
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= FRAME_HEADER.size:
+        length = FRAME_HEADER.unpack_from(buffer, offset)[0]
+        end = offset + FRAME_HEADER.size + length
+        if end > len(buffer):
+            break
+        frames.append((buffer[offset + FRAME_HEADER.size], bytes(buffer[offset + FRAME_HEADER.size + 1:end])))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+def pack_get_move(board: np.ndarray, turn: int, moves_remaining: int, time_remaining: float) -> bytes:
+    return GET_MOVE_BODY.pack(turn, moves_remaining, time_remaining) + board.astype(BOARD_DTYPE, copy=False).tobytes()
+
+
+def unpack_get_move(body: bytes, board_shape: Tuple[int, int]) -> Tuple[np.ndarray, int, int, float]:
+    """ The board is read-only, as the engine hands it to players. """
+    turn, moves_remaining, time_remaining = GET_MOVE_BODY.unpack_from(body)
+    board = np.frombuffer(body, dtype=BOARD_DTYPE, offset=GET_MOVE_BODY.size).reshape(board_shape)
+    return board, turn, moves_remaining, time_remaining
+
+
+def pack_move_result(move: str, turn: int, pos: List[int], result: MoveResult) -> bytes:
+    scout = () if result.scout is None else [int(x) for x in np.ravel(result.scout)]
+    has_value = result.value is not None
+    return MOVE_RESULT_BODY.pack(
+        MOVE_CODES.get(move, NO_MOVE),
+        turn,
+        *encode_pos(pos),
+        result.code,
+        has_value,
+        result.value if has_value else 0,
+        len(scout)
+    ) + struct.pack(f'<{len(scout)}h', *scout)
+
+
+def decode_pos(move: str, coords: Tuple[int, ...]) -> List[int]:
+    num_coords = 4 if move == 'colonise' else 2
+    return [coord for coord in coords[:num_coords] if coord != NO_COORD]
+
+
+def unpack_move_result(body: bytes) -> Tuple[str, int, List[int], MoveResult]:
+    move_code, turn, *coords, code, has_value, value, num_scout = MOVE_RESULT_BODY.unpack_from(body)
+    move = MOVES[move_code] if move_code < len(MOVES) else ''
+    scout = None
+    if num_scout > 0:
+        scout = np.frombuffer(body, dtype=BOARD_DTYPE, count=num_scout, offset=MOVE_RESULT_BODY.size)
+    return move, turn, decode_pos(move, coords), MoveResult(code, value if has_value else None, scout)
+
+
+def pack_move(move: str, pos: List[int]) -> bytes:
+    return MOVE_BODY.pack(MOVE_CODES.get(move, NO_MOVE), *encode_pos(pos))
+
+
+def unpack_move(body: bytes) -> Tuple[str, List[int]]:
+    move_code, *coords = MOVE_BODY.unpack(body)
+    move = MOVES[move_code] if move_code < len(MOVES) else ''
+    return move, decode_pos(move, coords)
+
+
+def pack_get_move_batch(requests: List[Tuple[int, bytes]]) -> bytes:
+    """ GET_MOVE_BATCH from (session id, GET_MOVE body) pairs. """
+    return COUNT.pack(len(requests)) + b''.join(SESSION.pack(session) + body for session, body in requests)
+
+
+def unpack_get_move_batch(body: bytes, board_shapes: Dict[int, Tuple[int, int]]) -> List[Tuple[int, bytes]]:
+    """ (session id, GET_MOVE body) pairs; board_shapes gives each session's board size. """
+    requests = []
+    offset = COUNT.size
+    for _i in range(COUNT.unpack_from(body)[0]):
+        session = SESSION.unpack_from(body, offset)[0]
+        offset += SESSION.size
+        num_rows, num_cols = board_shapes[session]
+        size = GET_MOVE_BODY.size + num_rows * num_cols * BOARD_DTYPE.itemsize
+        requests.append((session, body[offset:offset + size]))
+        offset += size
+    return requests
+
+
+def pack_move_batch(moves: List[Tuple[int, float, str, List[int]]]) -> bytes:
+    """ MOVE_BATCH from (session id, seconds taken, move, pos) tuples. """
+    return COUNT.pack(len(moves)) + b''.join(
+        MOVE_BATCH_ENTRY.pack(session, time_taken) + pack_move(move, pos) for session, time_taken, move, pos in moves
+    )
+
+
+def unpack_move_batch(body: bytes) -> List[Tuple[int, float, str, List[int]]]:
+    moves = []
+    offset = COUNT.size
+    for _i in range(COUNT.unpack_from(body)[0]):
+        session, time_taken = MOVE_BATCH_ENTRY.unpack_from(body, offset)
+        offset += MOVE_BATCH_ENTRY.size
+        move, pos = unpack_move(body[offset:offset + MOVE_BODY.size])
+        offset += MOVE_BODY.size
+        moves.append((session, time_taken, move, pos))
+    return moves
@@ -0,0 +1,227 @@
+""" The plantation command line.
+
+    plantation bots
+    plantation run scry-and-die random --seed 1
+    plantation match scry-and-die 'php:{"name": "Crocodilian"}' --games 100
+    plantation tournament random scry-and-die mcts --games-per-pair 20
+    plantation bench engine players --quick
+
+Players are given as a bot name from the registry, optionally followed by a
+colon and a JSON object of keyword arguments for the bot.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from plantation.registry import BotFactory, available_bots
+
+# only for annotations: the engine, and numpy with it, are imported by the
+# commands that play games, so that e.g. `plantation bots` starts quickly
+if TYPE_CHECKING:
+    from plantation.include import SeedLike
+    from plantation.match import PlayerFactory
+
+ENGINE_DEFAULTS = dict(
+    num_rows=11,
+    num_cols=11,
+    max_turns=100,
+    starting_tiles=3,
+    starting_seconds=1.0,
+    time_increment=0.1
+)
+
+
+def parse_player(spec: str) -> BotFactory:
+    bot, _, kwargs = spec.partition(':')
+    try:
+        kwargs = json.loads(kwargs) if kwargs else {}
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(f"bad keyword arguments for {bot}: {e}")
+    if bot not in available_bots():
+        raise argparse.ArgumentTypeError(f"unknown bot {bot!r}, see `plantation bots`")
+    if not isinstance(kwargs, dict):
+        raise argparse.ArgumentTypeError(f"keyword arguments for {bot} should be a JSON object")
+    return BotFactory(bot, **kwargs)
+
+
+def print_progress(game: int, num_games: int):
+    if game % max(num_games // 20, 1) == 0:
+        print("=", end="", flush=True)
+
+
+def play_match(
+        factory_a: 'PlayerFactory',
+        factory_b: 'PlayerFactory',
+        num_games: int,
+        engine_kwargs: Dict,
+        processes: Optional[int] = None,
+        seed: Optional['SeedLike'] = None
+):
+    """ Runs a match, printing progress and then the stats. """
+    from plantation.match import MatchStats, run_match
+
+    stats = MatchStats()
+    print("Running games: [", end="", flush=True)
+    start_time = time.time()
+    for game, result in enumerate(run_match(factory_a, factory_b, num_games, engine_kwargs, processes, seed)):
+        print_progress(game, num_games)
+        stats.add(result)
+
+        if result.score == 100:
+            print(result.player_m, "ran out of time")
+        elif result.score == -100:
+            print(result.player_p, "ran out of time")
+
+    print("]")
+    print()
+    stats.print_summary()
+    print("Seconds:", time.time() - start_time)
+
+
+def play_tournament(
+        factories: Dict[str, 'PlayerFactory'],
+        num_games_per_pair: int,
+        engine_kwargs: Dict,
+        processes: Optional[int] = None,
+        self_play: bool = False,
+        seed: Optional['SeedLike'] = None
+):
+    """ Runs a tournament, printing progress and then the stats. """
+    from plantation.tournament import TournamentStats, run_tournament, schedule_games
+
+    stats = TournamentStats(list(factories.keys()))
+    num_games = len(schedule_games(list(factories.keys()), num_games_per_pair, self_play))
+    print(f"Running {num_games} games, being {num_games_per_pair} for each pair, between {len(factories)} players, "
+          f"{num_games_per_pair*(len(factories)-1)} games for each player")
+    print("Running games: [", end="", flush=True)
+    start_time = time.time()
+    results = run_tournament(factories, num_games_per_pair, engine_kwargs, processes, self_play, seed)
+    for game, result in enumerate(results):
+        print_progress(game, num_games)
+        stats.add(result)
+
+        if result.score == 100:
+            print(result.entrant_m, "ran out of time")
+        elif result.score == -100:
+            print(result.entrant_p, "ran out of time")
+
+    print("]")
+    print()
+    stats.print_summary()
+    print()
+    print("Seconds:", time.time() - start_time)
+
+
+def engine_kwargs_from(args: argparse.Namespace) -> Dict:
+    return {key: getattr(args, key) for key in ENGINE_DEFAULTS}
+
+
+def cmd_bots(args: argparse.Namespace):
+    for bot, location in sorted(available_bots().items()):
+        print(f"{bot:<16} {location}")
+
+
+def cmd_run(args: argparse.Namespace):
+    from plantation.engine import Engine
+
+    engine = Engine(**engine_kwargs_from(args))
+    engine.output = None if args.output == 'none' else args.output
+    score = engine.run_game(args.player_p(), args.player_m(), seed=args.seed)
+    if engine.output != 'stdout':
+        print(f"Score: {score:+}")
+
+
+def cmd_match(args: argparse.Namespace):
+    # the summary tells the two players apart by name
+    if args.player_a.name == args.player_b.name:
+        sys.exit(f"Both players are called {args.player_a.name}; give them different names")
+    play_match(args.player_a, args.player_b, args.games, engine_kwargs_from(args), args.processes, args.seed)
+
+
+def cmd_tournament(args: argparse.Namespace):
+    factories = {}
+    for factory in args.entrants:
+        if factory.name in factories:
+            sys.exit(f"Two entrants are called {factory.name}; give them different names")
+        factories[factory.name] = factory
+    play_tournament(
+        factories, args.games_per_pair, engine_kwargs_from(args), args.processes, args.self_play, args.seed
+    )
+
+
+def cmd_bench(args: argparse.Namespace):
+    from plantation.bench import BENCHMARKS, run_benchmarks
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(unknown)}, expected some of: {', '.join(BENCHMARKS)}")
+    results = run_benchmarks(args.benchmarks, quick=args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+def add_game_options(parser: argparse.ArgumentParser, processes: bool = True):
+    group = parser.add_argument_group("game settings")
+    group.add_argument('--rows', dest='num_rows', type=int, default=ENGINE_DEFAULTS['num_rows'])
+    group.add_argument('--cols', dest='num_cols', type=int, default=ENGINE_DEFAULTS['num_cols'])
+    group.add_argument('--max-turns', type=int, default=ENGINE_DEFAULTS['max_turns'])
+    group.add_argument('--starting-tiles', type=int, default=ENGINE_DEFAULTS['starting_tiles'])
+    group.add_argument('--starting-seconds', type=float, default=ENGINE_DEFAULTS['starting_seconds'])
+    group.add_argument('--time-increment', type=float, default=ENGINE_DEFAULTS['time_increment'])
+    group.add_argument('--seed', type=int, help="make the games reproducible")
+    if processes:
+        group.add_argument('--processes', type=int, help="worker processes (default: one per CPU)")
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='plantation', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    bots = commands.add_parser('bots', help="list the bots that can be played")
+    bots.set_defaults(func=cmd_bots)
+
+    run = commands.add_parser('run', help="play a single game and show it")
+    run.add_argument('player_p', type=parse_player, help="the player who moves first")
+    run.add_argument('player_m', type=parse_player)
+    run.add_argument('--output', default='stdout', help="where the game log goes: stdout, a file name, or none")
+    add_game_options(run, processes=False)
+    run.set_defaults(func=cmd_run)
+
+    match = commands.add_parser('match', help="play a series of games between two players")
+    match.add_argument('player_a', type=parse_player)
+    match.add_argument('player_b', type=parse_player)
+    match.add_argument('--games', type=int, default=100)
+    add_game_options(match)
+    match.set_defaults(func=cmd_match)
+
+    tournament = commands.add_parser('tournament', help="play every pair of entrants against each other")
+    tournament.add_argument('entrants', type=parse_player, nargs='+')
+    tournament.add_argument('--games-per-pair', type=int, default=20, help="should be even, to share first turns")
+    tournament.add_argument('--self-play', action='store_true', help="also play each entrant against itself")
+    add_game_options(tournament)
+    tournament.set_defaults(func=cmd_tournament)
+
+    # the benchmark names are checked by run_benchmarks, so bench.py is only imported when it runs
+    bench = commands.add_parser('bench', help="time the engine, bots and I/O paths, as JSON")
+    bench.add_argument('benchmarks', nargs='*', help="benchmarks to run (default: all)")
+    bench.add_argument('--quick', action='store_true', help="fewer repetitions, for a rough check")
+    bench.add_argument('--output', help="write the JSON here instead of to stdout")
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = make_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
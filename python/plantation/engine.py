@@ -1,26 +1,29 @@
+from functools import partial
 import random
 import time
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 
+from plantation.bitboard import BitBoard
+from plantation.game_state import GameState
+from plantation.legal_moves import LegalMoves, compute_legal_moves
 from plantation.player import Player
-from plantation.include import get_player_restricted_board, display_board_text
+from plantation.include import SeedLike, child_seed, get_player_restricted_board, display_board_text, make_rngs
+from plantation.move_result import MoveResult
+from plantation.rules import Rules
 
 
-class Engine:
+class Engine(Rules):
 
-    moves_required = {
-        'fertilise': 1,
-        'plant': 1,
-        'scout': 1,
-        'colonise': 2,
-        'spray': 2,
-        'bomb': 2
-    }
-    bomb_damage = 4
+    # maintain bit masks of each player's tiles alongside the board. This is
+    # also switched on for a game if either player sets use_bitboard
+    use_bitboards = False
     output = "stdout"
-    outfile = None
+    # random stream for the starting board. A game run with a seed uses a
+    # stream of its own instead, set by seed_game for that game only
+    rng = random
+    game_rng = None
 
     def __init__(
             self,
@@ -39,43 +42,100 @@ class Engine:
         self.max_turns = max_turns
         self.board = None
         self.turn = 0
+        # running score totals, kept in step with the board by set_tile
+        self.total_p = 0
+        self.total_m = 0
+        # each player's restricted board, kept in step with the board by set_tile,
+        # and the read-only views of them that are handed to players
+        self.player_boards = {}
+        self.player_views = {}
+        # BitBoard per player, only kept when bitboards are in use
+        self.bitboards = {}
+        self.bitboards_enabled = self.use_bitboards
+        # bumped whenever a tile in a player's restricted board changes,
+        # so that per-player caches such as legal moves know when to refresh
+        self.board_versions = {1: 0, -1: 0}
+        self.legal_move_cache = {}
 
     def run_game(
             self,
             player_handler_p: Player,
             player_handler_m: Player,
+            seed: Optional[SeedLike] = None
     ) -> float:
-        self.start_of_game(player_handler_p, player_handler_m)
+        self.prepare_game(player_handler_p, player_handler_m, seed)
 
         time_p = self.starting_seconds
         time_m = self.starting_seconds
         for self.turn in range(1, self.max_turns+1):
-            self.vprint()
-            self.vprint("--------------------------------------------------------------")
-            self.vprint(f"Turn {self.turn}")
-            self.vprint("=========")
-            t = self.run_player_turn(1, player_handler_p, time_p)
-            time_p = time_p - t + self.time_increment
+            self.start_turn()
+            time_p = self.clock_after_turn(time_p, self.run_player_turn(1, player_handler_p, time_p))
             if time_p < 0:
                 break
-            self.vprint()
-            t = self.run_player_turn(-1, player_handler_m, time_m)
-            time_m = time_m - t + self.time_increment
+            time_m = self.clock_after_turn(time_m, self.run_player_turn(-1, player_handler_m, time_m))
             if time_m < 0:
                 break
 
+        return self.finish_game(player_handler_p, player_handler_m, time_p, time_m)
+
+    # The steps of run_game and run_player_turn, shared with AsyncEngine,
+    # which awaits the players in between them
+
+    def prepare_game(self, player_handler_p: Player, player_handler_m: Player, seed: Optional[SeedLike]):
+        if seed is not None:
+            self.seed_game(seed, player_handler_p, player_handler_m)
+        self.start_of_game(player_handler_p, player_handler_m)
+
+    def start_turn(self):
+        if self.output:
+            self.vprint()
+            self.vprint("--------------------------------------------------------------")
+            self.vprint(f"Turn {self.turn}")
+            self.vprint("=========")
+
+    def start_player_turn(self, sign: int, player_handler: Player, time_remaining: float):
+        if self.output:
+            if sign < 0:
+                self.vprint()
+            total_p, total_m = self.total_p, self.total_m
+            self.vprint(f"Score: {total_p:+}, {total_m:+}  ({total_p + total_m:+})")
+            self.vprint(display_board_text(self.board))
+            self.vprint(f"### {player_handler.name} ({'+' if sign > 0 else '-'}) ###  (time={time_remaining:.2f})")
+
+    def clock_after_turn(self, time_remaining: float, turn_time: float) -> float:
+        return time_remaining - turn_time + self.time_increment
+
+    def board_for_player(self, player_handler: Player, sign: int) -> np.ndarray:
+        if player_handler.copy_board:
+            return self.player_boards[sign].copy()
+        return self.player_views[sign]
+
+    def finish_game(self, player_handler_p: Player, player_handler_m: Player, time_p: float, time_m: float) -> float:
         p_score, m_score = self.score_game()
         self.end_of_game(p_score, m_score, player_handler_p, player_handler_m, time_p, time_m)
-
         return p_score + m_score
 
+    def seed_game(self, seed: SeedLike, player_handler_p: Player, player_handler_m: Player):
+        """ Gives the engine and each player separate streams derived from the seed. """
+        self.game_rng = make_rngs(child_seed(seed, 0))[0]
+        player_handler_p.seed(child_seed(seed, 1))
+        player_handler_m.seed(child_seed(seed, 2))
+
     def start_of_game(self, player_handler_p: Player, player_handler_m: Player):
         if self.output and self.output != "stdout":
             self.outfile = open(self.output, "w")
 
+        self.bitboards_enabled = self.use_bitboards \
+            or player_handler_p.use_bitboard or player_handler_m.use_bitboard
         self.initialise_board(self.starting_tiles)
+        # the seeded stream is only for this game, so later unseeded games are random again
+        self.game_rng = None
         player_handler_m.start_game(self.board.shape, sign=-1)
         player_handler_p.start_game(self.board.shape, sign=1)
+        for sign, player_handler in ((1, player_handler_p), (-1, player_handler_m)):
+            if player_handler.use_bitboard:
+                player_handler.bitboard = self.bitboards[sign]
+            player_handler.legal_move_source = partial(self.legal_moves, sign)
         self.at_start_of_game_action()
 
     def end_of_game(
@@ -88,6 +148,11 @@ class Engine:
             time_m: float
     ):
         self.vprint("********** Game over! **********")
+        # the players' links to this engine's state only hold during the game
+        for player_handler in (player_handler_p, player_handler_m):
+            player_handler.legal_move_source = None
+            if player_handler.use_bitboard:
+                player_handler.bitboard = None
         if time_p < 0:
             self.vprint(f"{player_handler_p.name} ran out of time!")
             return -100
@@ -102,18 +167,64 @@ class Engine:
         self.at_end_of_game_action()
 
     def initialise_board(self, starting_tiles: int) -> None:
-        self.board = np.zeros((self.num_rows, self.num_cols), dtype=np.short)
-        random_rows = random.sample(range(self.board.shape[0]), starting_tiles)
-        self.board[random_rows, 0] = 1
-
-        random_rows = random.sample(range(self.board.shape[0]), starting_tiles)
-        self.board[random_rows, -1] = -1
+        rng = self.game_rng if self.game_rng is not None else self.rng
+        board = np.zeros((self.num_rows, self.num_cols), dtype=np.short)
+        random_rows = rng.sample(range(board.shape[0]), starting_tiles)
+        board[random_rows, 0] = 1
+
+        random_rows = rng.sample(range(board.shape[0]), starting_tiles)
+        board[random_rows, -1] = -1
+
+        self.set_board(board)
+
+    def set_board(self, board: np.ndarray) -> None:
+        """ Replaces the whole board and rebuilds the state derived from it. """
+        self.board = board
+        self.total_p = int(board[board > 0].sum())
+        self.total_m = int(board[board < 0].sum())
+
+        for sign in (1, -1):
+            player_board = get_player_restricted_board(board, sign)
+            player_view = player_board.view()
+            player_view.flags.writeable = False
+            self.player_boards[sign] = player_board
+            self.player_views[sign] = player_view
+
+        if self.bitboards_enabled:
+            self.bitboards = {sign: BitBoard.from_board(board, sign) for sign in (1, -1)}
+        else:
+            self.bitboards = {}
+
+        self.board_versions = {1: 0, -1: 0}
+        self.legal_move_cache = {}
+
+    def set_tile(self, row: int, col: int, value: int) -> None:
+        old_value = self.board[row, col]
+        super().set_tile(row, col, value)
+
+        self.player_boards[1][row, col] = value if value > 0 else 0
+        self.player_boards[-1][row, col] = value if value < 0 else 0
+        if old_value > 0 or value > 0:
+            self.board_versions[1] += 1
+        if old_value < 0 or value < 0:
+            self.board_versions[-1] += 1
+
+    def legal_moves(self, sign: int, moves_remaining: int) -> LegalMoves:
+        """ Candidate moves for a player, computed at most once per change to their board. """
+        version = self.board_versions[sign]
+        cached = self.legal_move_cache.get(sign)
+        if cached is None or cached[0] != version:
+            legal_moves = compute_legal_moves(self.player_boards[sign], 3, self.bitboards.get(sign))
+            cached = (version, legal_moves, legal_moves.single_moves())
+            self.legal_move_cache[sign] = cached
+        return cached[1] if moves_remaining >= 2 else cached[2]
+
+    def get_game_state(self, sign: int = 1, moves_remaining: int = 3) -> GameState:
+        """ A copy of the current position, e.g. for analysis or search. """
+        return GameState(self.board.copy(), self.turn, sign, moves_remaining, self.max_turns)
 
     def score_game(self) -> Tuple[int, int]:
-        board = self.board
-        m_score = sum(board[board < 0])
-        p_score = sum(board[board > 0])
-        return p_score, m_score
+        return self.total_p, self.total_m
 
     def print_score(self, p_score: int, m_score: int, player_p: Player, player_m: Player) -> None:
         final_score = p_score + m_score
@@ -134,18 +245,9 @@ class Engine:
             player_handler: Player,
             time_remaining: float
     ) -> float:
-        board = self.board
-        total_p = np.sum(board[board > 0])
-        total_m = np.sum(board[board < 0])
-        self.vprint(f"Score: {total_p:+}, {total_m:+}  ({total_p + total_m:+})")
-
-        if self.output is not None:
-            board_str = display_board_text(board)
-            self.vprint(board_str)
+        self.start_player_turn(sign, player_handler, time_remaining)
 
         moves_remaining = 3
-
-        self.vprint(f"### {player_handler.name} ({'+' if sign > 0 else '-'}) ###  (time={time_remaining:.2f})")
         total_turn_time = 0.
         while moves_remaining > 0:
             time_taken, moves_taken = self.run_player_move(player_handler, time_remaining, moves_remaining, sign)
@@ -161,154 +263,34 @@ class Engine:
             moves_remaining: int,
             sign: int
     ) -> Tuple[float, int]:
-        board = self.board
-        player_board = get_player_restricted_board(board, sign)
+        player_board = self.board_for_player(player_handler, sign)
         start_time = time.time()
         move, pos = player_handler.get_move(
             player_board, self.turn, moves_remaining, time_remaining
         )
         time_taken = time.time() - start_time
-        result = self.do_move(move, pos, sign, moves_remaining)
-        move_str = f"{move} ({','.join([str(p) for p in pos])})"
-        self.vprint(f"{move_str:<20}  |  {result}")
-        player_handler.handle_move_result(move, self.turn, pos, result)
-        self.after_move_action(move, pos, sign, moves_remaining, result)
-        return time_taken, self.moves_required[move]
-
-    def do_fertilise(self, pos: List[int], sign: int) -> str:
-        board = self.board
-        row, col = pos[0], pos[1]
-        if sign * board[row][col] > 0:
-            board[row][col] += sign
-            return "OK"
-        else:
-            self.vprint("do_fertilise: tile not owned by player")
-            return "error"
-
-    def do_plant(self, pos: List[int], sign: int) -> str:
-        board = self.board
-
-        row, col = pos[0], pos[1]
-        if board[row][col] * sign > 0:
-            self.vprint("do_plant: target tile already owned by player")
-            return "error"
-        elif board[row][col] * sign < 0:
-            return f"occupied {board[row][col]}"
-
-        # now we know that board[row][col] == 0
-        for delta_r, delta_c in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            test_row = row + delta_r
-            test_col = col + delta_c
-            if 0 <= test_row < board.shape[0] and 0 <= test_col < board.shape[1]:
-                if board[row + delta_r][col + delta_c] * sign > 0:
-                    board[row][col] = sign
-                    return "OK"
-
-        self.vprint("do_plant: no adjacent tiles owned by player")
-        return "error"
-
-    def do_scout(self, pos: List[int], _sign: int) -> str:
-        board = self.board
-
-        row, col = pos[0], pos[1]
-        results = []
-        for delta_r in (-1, 0, 1):
-            for delta_c in (-1, 0, 1):
-                test_row = row + delta_r
-                test_col = col + delta_c
-                if 0 <= test_row < board.shape[0] \
-                        and 0 <= test_col < board.shape[1]:
-                    results.append(board[row + delta_r][col + delta_c])
-        return "OK " + ",".join([str(x) for x in results])
-
-    def do_colonise(self, pos: List[int], sign: int) -> str:
-        board = self.board
-
-        row, col, source_row, source_col = pos[0], pos[1], pos[2], pos[3]
-        if board[row][col] * sign > 0:
-            self.vprint("do_colonise: target tile already owned by player")
-            return "error"
-        elif board[source_row][source_col] * sign < 2:
-            self.vprint("do_colonise: source tile count less than 2")
-            return "error"
-
-        elif board[row][col] * sign < 0:
-            return f"occupied {board[row][col]}"
-        else:
-            board[row][col] = sign
-            board[source_row][source_col] -= sign
-            return "OK"
-
-    def do_spray(self, pos: List[int], sign: int) -> str:
-        board = self.board
-
-        row, col = pos[0], pos[1]
-        total = 0
-        for delta_r, delta_c in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
-            test_row = row + delta_r
-            test_col = col + delta_c
-            if 0 <= test_row < board.shape[0] and 0 <= test_col < board.shape[1]:
-                if board[test_row][test_col] * sign < 0:
-                    board[row + delta_r][col + delta_c] += sign
-                    total += 1
-        return f"OK {total}"
-
-    def do_bomb(self, pos: List[int], sign: int) -> str:
-        board = self.board
-
-        row, col = pos[0], pos[1]
-        if board[row][col] * sign > 0:
-
-            self.vprint(f"do_bomb: target tile owned by player")
-            return "error"
-        else:
-            levels_reduced = min(abs(board[row][col]), self.bomb_damage)
-            board[row][col] += sign * levels_reduced
-            return f"OK {levels_reduced}"
+        return time_taken, self.apply_player_move(player_handler, move, pos, sign, moves_remaining)
 
-    def do_move(
+    def apply_player_move(
             self,
+            player_handler: Player,
             move: str,
             pos: List[int],
             sign: int,
-            moves_remaining: int,
-    ):
-        board = self.board
-        if len(pos) < 2:
-            self.vprint(f"Invalid position: {pos}")
-            return "error"
-        row, col = pos[0], pos[1]
-        if row < 0 or row >= board.shape[0] or col < 0 or col >= board.shape[1]:
-            self.vprint(f"Invalid location: ({row}, {col})")
-            return "error"
-        if move not in self.moves_required.keys():
-            self.vprint(f"Invalid move: {move}")
-            return "error"
-        if self.moves_required[move] > moves_remaining:
-            self.vprint(f"Not enough moves remaining for {move}")
-            return "error"
-
-        if move == 'fertilise':
-            return self.do_fertilise(pos, sign)
-        elif move == 'plant':
-            return self.do_plant(pos, sign)
-        elif move == 'scout':
-            return self.do_scout(pos, sign)
-        elif move == 'colonise':
-            return self.do_colonise(pos, sign)
-        elif move == 'spray':
-            return self.do_spray(pos, sign)
-        else:  # move == 'bomb':
-            return self.do_bomb(pos, sign)
-
-    def vprint(self, *args, **kwargs):
-        if not self.output:
-            return
-        elif self.output == "stdout":
-            print(*args, **kwargs)
+            moves_remaining: int
+    ) -> int:
+        """ Plays a move the player has chosen and tells it the result.
+        Returns the number of moves it used. """
+        result = self.do_move(move, pos, sign, moves_remaining)
+        if self.output:
+            move_str = f"{move} ({','.join([str(p) for p in pos])})"
+            self.vprint(f"{move_str:<20}  |  {result}")
+        if player_handler.structured_results:
+            player_handler.handle_move_result(move, self.turn, pos, result)
         else:
-            kwargs['file'] = self.outfile
-            print(*args, **kwargs)
+            player_handler.handle_move_result(move, self.turn, pos, str(result))
+        self.after_move_action(move, pos, sign, moves_remaining, result)
+        return self.moves_required[move]
 
     def at_start_of_game_action(self):
         pass
@@ -319,7 +301,7 @@ class Engine:
             pos: List[int],
             sign: int,
             moves_remaining: int,
-            result: str
+            result: MoveResult
     ):
         pass
 
@@ -0,0 +1,244 @@
+""" Compact binary records of played games.
+
+A record file starts with a 6 byte header: the magic b"PLRC", a format
+version, and a compression code. Everything after the header is a stream
+of records, compressed as a whole with zlib or lzma if requested. Each
+record starts with a type byte:
+
+- 0xF0 game start: rows, cols (u8), max_turns (u16), number of starting
+  tiles (u8), then (row, col, value) for each tile as (u8, u8, i8).
+- 0..5 move, using the opcodes in include.MOVES: row, col, source_row,
+  source_col (i8, -128 where absent), result code (u8), result value (i16).
+  Every move record is 8 bytes. Scout values are not stored, since a replay
+  reproduces them.
+- 0xFF game end: + and - scores (i16), and who ran out of time
+  (0 nobody, 1 the + player, 2 the - player).
+
+The turn and side to move are not stored either: a replay works them out
+from the move costs, as the engine does.
+"""
+import lzma
+import struct
+import zlib
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from plantation.engine import Engine
+from plantation.game_state import GameState
+from plantation.include import MOVES, MOVE_CODES, encode_pos
+from plantation.move_result import MoveResult
+
+MAGIC = b'PLRC'
+VERSION = 1
+COMPRESSION_CODES = {None: 0, 'zlib': 1, 'lzma': 2}
+
+GAME_START = 0xF0
+GAME_END = 0xFF
+
+FILE_HEADER = struct.Struct('<4sBB')
+START_HEADER = struct.Struct('<BBHB')
+START_TILE = struct.Struct('<BBb')
+MOVE_RECORD = struct.Struct('<bbbbBh')
+END_RECORD = struct.Struct('<hhB')
+
+
+class RecordedMove(NamedTuple):
+    move: str
+    pos: List[int]
+    code: int
+    value: int
+
+
+class GameRecord(NamedTuple):
+    initial_board: np.ndarray
+    max_turns: int
+    moves: List[RecordedMove]
+    p_score: Optional[int]
+    m_score: Optional[int]
+    timed_out: int
+
+    def replay(self) -> Iterator[Tuple[RecordedMove, MoveResult, GameState]]:
+        """ Plays the moves through the engine rules, yielding each move with
+        its result and the state after it. The state is updated in place. """
+        state = GameState(self.initial_board.copy(), max_turns=self.max_turns)
+        for recorded in self.moves:
+            result = state.apply(recorded.move, recorded.pos)
+            yield recorded, result, state
+
+    def final_board(self) -> np.ndarray:
+        state = None
+        for _recorded, _result, state in self.replay():
+            pass
+        if state is None:
+            return self.initial_board.copy()
+        return state.board.copy()
+
+
+class GameRecordWriter:
+    """ Streams game records to a file, one game after another. """
+
+    def __init__(self, target: Union[str, BinaryIO], compression: Optional[str] = None):
+        if isinstance(target, str):
+            self.file = open(target, 'wb')
+            self.owns_file = True
+        else:
+            self.file = target
+            self.owns_file = False
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, COMPRESSION_CODES[compression]))
+
+        if compression == 'zlib':
+            self.compressor = zlib.compressobj(9)
+        elif compression == 'lzma':
+            self.compressor = lzma.LZMACompressor()
+        else:
+            self.compressor = None
+
+    def write(self, data: bytes) -> None:
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self.file.write(data)
+
+    def start_game(self, board: np.ndarray, max_turns: int) -> None:
+        rows, cols = np.nonzero(board)
+        data = [bytes([GAME_START]), START_HEADER.pack(board.shape[0], board.shape[1], max_turns, len(rows))]
+        for row, col in zip(rows, cols):
+            data.append(START_TILE.pack(row, col, board[row, col]))
+        self.write(b''.join(data))
+
+    def write_move(self, move: str, pos: List[int], result: MoveResult) -> None:
+        value = result.value if result.value is not None else 0
+        self.write(bytes([MOVE_CODES[move]]) + MOVE_RECORD.pack(*encode_pos(pos), result.code, value))
+
+    def end_game(self, p_score: int, m_score: int, timed_out: int = 0) -> None:
+        self.write(bytes([GAME_END]) + END_RECORD.pack(p_score, m_score, timed_out))
+
+    def close(self) -> None:
+        if self.compressor is not None:
+            self.file.write(self.compressor.flush())
+            self.compressor = None
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class GameRecordReader:
+    """ Reads back the games written by GameRecordWriter, one at a time. """
+
+    chunk_size = 1 << 16
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        if isinstance(source, str):
+            self.file = open(source, 'rb')
+            self.owns_file = True
+        else:
+            self.file = source
+            self.owns_file = False
+
+        magic, version, compression = FILE_HEADER.unpack(self.file.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} game record file")
+        if compression == COMPRESSION_CODES['zlib']:
+            self.decompressor = zlib.decompressobj()
+        elif compression == COMPRESSION_CODES['lzma']:
+            self.decompressor = lzma.LZMADecompressor()
+        else:
+            self.decompressor = None
+        self.buffer = b''
+        self.offset = 0
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) - self.offset < size:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                break
+            if self.decompressor is not None:
+                chunk = self.decompressor.decompress(chunk)
+            self.buffer = self.buffer[self.offset:] + chunk
+            self.offset = 0
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        game = None
+        while True:
+            record_type = self.read(1)
+            if not record_type:
+                break
+            record_type = record_type[0]
+
+            if record_type == GAME_START:
+                num_rows, num_cols, max_turns, num_tiles = START_HEADER.unpack(self.read(START_HEADER.size))
+                board = np.zeros((num_rows, num_cols), dtype=np.short)
+                for _i in range(num_tiles):
+                    row, col, value = START_TILE.unpack(self.read(START_TILE.size))
+                    board[row, col] = value
+                if game is not None:
+                    yield game  # previous game stopped without an end record
+                game = GameRecord(board, max_turns, [], None, None, 0)
+
+            elif record_type == GAME_END:
+                p_score, m_score, timed_out = END_RECORD.unpack(self.read(END_RECORD.size))
+                yield game._replace(p_score=p_score, m_score=m_score, timed_out=timed_out)
+                game = None
+
+            else:
+                *coords, code, value = MOVE_RECORD.unpack(self.read(MOVE_RECORD.size))
+                move = MOVES[record_type]
+                num_coords = 4 if move == 'colonise' else 2
+                game.moves.append(RecordedMove(move, coords[:num_coords], code, value))
+
+        if game is not None:
+            yield game
+
+    def close(self) -> None:
+        if self.owns_file:
+            self.file.close()
+
+    def __enter__(self) -> 'GameRecordReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RecordingEngine(Engine):
+    """ An Engine that streams every game it plays to a GameRecordWriter. """
+
+    def __init__(self, writer: GameRecordWriter, *args, **kwargs):
+        self.writer = writer
+        super().__init__(*args, **kwargs)
+
+    def at_start_of_game_action(self):
+        self.writer.start_game(self.board, self.max_turns)
+
+    def after_move_action(
+            self,
+            move: str,
+            pos: List[int],
+            sign: int,
+            moves_remaining: int,
+            result: MoveResult
+    ):
+        self.writer.write_move(move, pos, result)
+
+    def end_of_game(
+            self,
+            p_score: int,
+            m_score: int,
+            player_handler_p,
+            player_handler_m,
+            time_p: float,
+            time_m: float
+    ):
+        super().end_of_game(p_score, m_score, player_handler_p, player_handler_m, time_p, time_m)
+        timed_out = 1 if time_p < 0 else 2 if time_m < 0 else 0
+        self.writer.end_game(p_score, m_score, timed_out)
@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from plantation.include import get_player_restricted_board
+from plantation.move_result import MoveResult
+from plantation.rules import Rules
+
+
+class GameState(Rules):
+    """ A full game position that can be played forwards and rolled back.
+
+    apply() plays a move for the side to move with the same rules as Engine,
+    and advances the turn once that side's three moves are used up. Each
+    changed tile is written to an undo log, so undo() only touches the tiles
+    the last move changed. There is no clock: timing is up to the caller.
+    """
+
+    moves_per_turn = 3
+
+    def __init__(
+            self,
+            board: np.ndarray,
+            turn: int = 1,
+            sign: int = 1,
+            moves_remaining: int = 3,
+            max_turns: int = 100
+    ):
+        self.board = board
+        self.turn = turn
+        self.sign = sign
+        self.moves_remaining = moves_remaining
+        self.max_turns = max_turns
+        self.total_p = int(board[board > 0].sum())
+        self.total_m = int(board[board < 0].sum())
+        self.bitboards = {}
+
+        # (row, col, old value) for every tile change, and for every applied
+        # move the undo log length and the state before it
+        self.undo_log: List[Tuple[int, int, int]] = []
+        self.frames: List[Tuple[int, int, int, int, int, int]] = []
+
+    def set_tile(self, row: int, col: int, value: int) -> None:
+        self.undo_log.append((row, col, self.board[row, col]))
+        super().set_tile(row, col, value)
+
+    def apply(self, move: str, pos: List[int]) -> MoveResult:
+        self.frames.append((
+            len(self.undo_log), self.turn, self.sign, self.moves_remaining, self.total_p, self.total_m
+        ))
+        result = self.do_move(move, pos, self.sign, self.moves_remaining)
+
+        # like Engine, a move costs its moves even when it fails
+        self.moves_remaining -= self.moves_required.get(move, 1)
+        if self.moves_remaining <= 0:
+            if self.sign == -1:
+                self.turn += 1
+            self.sign = -self.sign
+            self.moves_remaining = self.moves_per_turn
+        return result
+
+    def undo(self) -> None:
+        log_length, self.turn, self.sign, self.moves_remaining, self.total_p, self.total_m \
+            = self.frames.pop()
+        board = self.board
+        undo_log = self.undo_log
+        while len(undo_log) > log_length:
+            row, col, value = undo_log.pop()
+            board[row, col] = value
+
+    def copy(self, out: Optional['GameState'] = None) -> 'GameState':
+        """ A copy of the current position, without undo history.
+
+        Passing a previous copy as `out` reuses its board array instead of
+        allocating a new one.
+        """
+        if out is None:
+            out = GameState.__new__(GameState)
+            out.board = self.board.copy()
+            out.bitboards = {}
+            out.undo_log = []
+            out.frames = []
+        else:
+            np.copyto(out.board, self.board)
+            out.undo_log.clear()
+            out.frames.clear()
+        out.turn = self.turn
+        out.sign = self.sign
+        out.moves_remaining = self.moves_remaining
+        out.max_turns = self.max_turns
+        out.total_p = self.total_p
+        out.total_m = self.total_m
+        return out
+
+    def is_over(self) -> bool:
+        return self.turn > self.max_turns
+
+    def score(self) -> int:
+        return self.total_p + self.total_m
+
+    def player_board(self, sign: int) -> np.ndarray:
+        return get_player_restricted_board(self.board, sign)
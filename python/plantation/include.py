@@ -1,6 +1,50 @@
 import numpy as np
 import io
+import random
 from contextlib import redirect_stdout
+from typing import List, Optional, Union
+
+SeedLike = Union[int, np.random.SeedSequence]
+
+# move opcodes, in the order used by array-based engines and record formats
+MOVES = ('fertilise', 'plant', 'scout', 'colonise', 'spray', 'bomb')
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+# result codes for array-based move results
+RESULT_OK = 0
+RESULT_ERROR = 1
+RESULT_OCCUPIED = 2
+
+# a coordinate that is absent, e.g. the source of a move other than colonise,
+# in record formats and the bot protocol
+NO_COORD = -128
+
+
+def encode_pos(pos: List[int]) -> List[int]:
+    """ The four coordinates of a move as i8 values, NO_COORD where absent. """
+    coords = [NO_COORD] * 4
+    for i, coord in enumerate(list(pos)[:4]):
+        coord = int(coord)
+        coords[i] = coord if -128 < coord < 128 else NO_COORD
+    return coords
+
+
+def child_seed(seed: Optional[SeedLike], *key: int) -> np.random.SeedSequence:
+    """ The seed sequence for child `key` of `seed`, e.g. one game of a match.
+
+    Unlike SeedSequence.spawn this does not depend on how many children have
+    been spawned before, so the same seed and key always give the same stream.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + key, pool_size=seed.pool_size)
+
+
+def make_rngs(seed: SeedLike) -> tuple:
+    """ A (random.Random, np.random.Generator) pair seeded from the same sequence. """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return random.Random(seed.generate_state(4).tobytes()), np.random.default_rng(seed)
 
 
 def get_player_restricted_board(board: np.ndarray, player: int) -> np.ndarray:
@@ -9,6 +53,19 @@ def get_player_restricted_board(board: np.ndarray, player: int) -> np.ndarray:
     return board * (board * player > 0)
 
 
+def cross_sum(values: np.ndarray) -> np.ndarray:
+    """ Each tile plus its four neighbours, i.e. what a spray there would hit.
+    The same as convolving with a cross kernel, and added up in the same
+    order as scipy's convolve2d so that the results match it exactly. """
+    total = np.zeros_like(values)
+    total[:, :-1] = values[:, 1:]
+    total[:-1, :] += values[1:, :]
+    total += values
+    total[:, 1:] += values[:, :-1]
+    total[1:, :] += values[:-1, :]
+    return total
+
+
 def display_board_text(board):
     f = io.StringIO()
     with redirect_stdout(f):
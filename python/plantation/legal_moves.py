@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from plantation.bitboard import BitBoard
+from plantation.include import MOVES, MOVE_CODES
+
+NO_TILES = np.empty((0, 2), dtype=int)
+NO_TILES.flags.writeable = False
+
+
+class LegalMoves:
+    """ Candidate targets for each move type, as (k, 2) arrays of [row, col].
+
+    These are worked out from one player's own board, so they are the moves
+    that player can know to be legal: plant and colonise targets may still
+    turn out to be "occupied" by the opponent. spray and bomb targets are the
+    tiles the player does not hold. Two-move types are empty when only one
+    move remains. The arrays are shared, so they are read-only.
+    """
+
+    __slots__ = ('fertilise', 'plant', 'colonise_sources', 'colonise_targets', 'spray', 'bomb')
+
+    def __init__(
+            self,
+            fertilise: np.ndarray,
+            plant: np.ndarray,
+            colonise_sources: np.ndarray,
+            colonise_targets: np.ndarray,
+            spray: np.ndarray,
+            bomb: np.ndarray
+    ):
+        self.fertilise = fertilise
+        self.plant = plant
+        self.colonise_sources = colonise_sources
+        self.colonise_targets = colonise_targets
+        self.spray = spray
+        self.bomb = bomb
+
+    def moves(self) -> List[str]:
+        """ The move types that have at least one candidate. """
+        options = []
+        if len(self.fertilise) > 0:
+            options.append('fertilise')
+        if len(self.plant) > 0:
+            options.append('plant')
+        if len(self.colonise_sources) > 0 and len(self.colonise_targets) > 0:
+            options.append('colonise')
+        if len(self.spray) > 0:
+            options.append('spray')
+        if len(self.bomb) > 0:
+            options.append('bomb')
+        return options
+
+    def action_mask(self, board_shape: Tuple[int, int]) -> np.ndarray:
+        """ A (rows, cols, len(MOVES)) bool array, in the order of include.MOVES,
+        of the tiles each move type can target. scout can target any tile,
+        and colonise targets only count when there is a source. """
+        mask = np.zeros(board_shape + (len(MOVES), ), dtype=bool)
+        for move in ('fertilise', 'plant', 'spray', 'bomb'):
+            tiles = getattr(self, move)
+            mask[tiles[:, 0], tiles[:, 1], MOVE_CODES[move]] = True
+        mask[:, :, MOVE_CODES['scout']] = True
+        if len(self.colonise_sources) > 0:
+            tiles = self.colonise_targets
+            mask[tiles[:, 0], tiles[:, 1], MOVE_CODES['colonise']] = True
+        return mask
+
+    def single_moves(self) -> 'LegalMoves':
+        """ The same candidates with the two-move types removed. """
+        return LegalMoves(self.fertilise, self.plant, NO_TILES, NO_TILES, NO_TILES, NO_TILES)
+
+
+def read_only(tiles: np.ndarray) -> np.ndarray:
+    tiles.flags.writeable = False
+    return tiles
+
+
+def compute_legal_moves(
+        player_board: np.ndarray,
+        moves_remaining: int,
+        bitboard: Optional[BitBoard] = None
+) -> LegalMoves:
+    owned = player_board != 0
+    if bitboard is not None:
+        plant = bitboard.to_coords(bitboard.plantable_tiles())
+    else:
+        padded = np.pad(owned, 1)
+        adjacent = padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+        plant = np.argwhere(adjacent & ~owned)
+
+    fertilise = np.argwhere(owned)
+    legal_moves = LegalMoves(read_only(fertilise), read_only(plant), NO_TILES, NO_TILES, NO_TILES, NO_TILES)
+    if moves_remaining < 2:
+        return legal_moves
+
+    empty = read_only(np.argwhere(~owned))
+    legal_moves.colonise_sources = read_only(np.argwhere(np.abs(player_board) > 1))
+    legal_moves.colonise_targets = empty
+    legal_moves.spray = empty
+    legal_moves.bomb = empty
+    return legal_moves
@@ -1,31 +1,100 @@
-from typing import List
+from typing import Dict, List, Optional, Union
 import numpy as np
 import h5py
 from datetime import datetime
 import os
 
-from plantation.include import get_player_restricted_board
+from plantation.include import get_player_restricted_board, RESULT_ERROR, RESULT_OCCUPIED
+from plantation.move_result import MoveResult
+
+
+class BoardStatsWriter:
+    """ Collects BoardStats games into one HDF5 file.
+
+    Games are buffered in memory and appended in batches of `flush_games` to
+    chunked, compressed datasets with one record per half-turn along the first
+    axis. `game_start` holds the first record of each game, so game i covers
+    records game_start[i] to game_start[i + 1] (or the end). Use one writer,
+    and one file, per worker process: see for_worker.
+    """
+
+    def __init__(
+            self,
+            filename: str,
+            flush_games: int = 64,
+            chunk_records: int = 256,
+            compression: Optional[str] = 'gzip',
+            compression_opts: Optional[int] = 4
+    ):
+        self.file = h5py.File(filename, 'a')
+        self.flush_games = flush_games
+        self.chunk_records = chunk_records
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.pending: List[Dict[str, np.ndarray]] = []
+        self.num_records = self.file['turn'].shape[0] if 'turn' in self.file else 0
+
+    @classmethod
+    def for_worker(cls, out_dir: str, **kwargs) -> 'BoardStatsWriter':
+        """ A writer to a file of its own for the current process. """
+        os.makedirs(out_dir, exist_ok=True)
+        return cls(os.path.join(out_dir, f'board_stats-{os.getpid()}.h5'), **kwargs)
+
+    def add_game(self, results: Dict[str, np.ndarray]) -> None:
+        self.pending.append({k: v.copy() for k, v in results.items()})
+        if len(self.pending) >= self.flush_games:
+            self.flush()
+
+    def append(self, name: str, data: np.ndarray) -> None:
+        if name not in self.file:
+            self.file.create_dataset(
+                name,
+                shape=(0, ) + data.shape[1:],
+                maxshape=(None, ) + data.shape[1:],
+                dtype=data.dtype,
+                chunks=(self.chunk_records, ) + data.shape[1:],
+                compression=self.compression,
+                compression_opts=self.compression_opts
+            )
+        dataset = self.file[name]
+        start = dataset.shape[0]
+        dataset.resize(start + len(data), axis=0)
+        dataset[start:] = data
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        lengths = [len(game['turn']) for game in self.pending]
+        starts = self.num_records + np.cumsum([0] + lengths[:-1])
+        self.append('game_start', np.array(starts, dtype=np.int64))
+        for k in self.pending[0].keys():
+            self.append(k, np.concatenate([game[k] for game in self.pending]))
+        self.num_records += sum(lengths)
+        self.pending = []
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
 
+    def __enter__(self) -> 'BoardStatsWriter':
+        return self
 
-def create_or_append_hdf5(filename, data, dataset_name):
-    with h5py.File(filename, "a") as f:  # 'a' mode for read/write access and create file if it doesn't exist
-        if dataset_name in f:
-            # Append to the existing dataset
-            dataset = f[dataset_name]
-            dataset.resize((dataset.shape[0] + 1,) + dataset.shape[1:])
-            dataset[-1] = data
-        else:
-            # Create a new dataset
-            # 'maxshape' is set to None for unlimited dimensions
-            f.create_dataset(dataset_name, data=data, maxshape=(None,) + data.shape)
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 class BoardStats:
     board_info = None
     out_dir = ''
     results = {}
+    num_records = 0
 
-    def __init__(self):
+    def __init__(self, max_turns: int = 100, writer: Optional[BoardStatsWriter] = None):
+        # games go to the writer if there is one, otherwise to .npy files in out/
+        self.writer = writer
+        # one record per half-turn; the buffers grow if a game runs longer
+        self.capacity = max_turns * 2
         self.board_info = {
             -1: np.zeros((11, 11, 11), np.short),
             1: np.zeros((11, 11, 11), np.short)
@@ -45,21 +114,34 @@ class BoardStats:
         # 10: turn when the second recent spray was deployed
 
     def init_results(self):
+        # turn-major buffers, filled up to num_records
         self.results = {
-            'board_info': np.empty((11, 11, 11, 0), dtype=np.short),
-            'turn': np.empty((0, ), dtype=np.short),
-            'sign': np.empty((0, ), dtype=np.short),
-            'opp_board': np.empty((11, 11, 0), dtype=np.short),
+            'board_info': np.empty((self.capacity, 11, 11, 11), dtype=np.short),
+            'turn': np.empty((self.capacity, ), dtype=np.short),
+            'sign': np.empty((self.capacity, ), dtype=np.short),
+            'opp_board': np.empty((self.capacity, 11, 11), dtype=np.short),
         }
+        self.num_records = 0
+
+    def grow_results(self):
+        self.capacity *= 2
+        for k, v in self.results.items():
+            grown = np.empty((self.capacity, ) + v.shape[1:], dtype=v.dtype)
+            grown[:self.num_records] = v[:self.num_records]
+            self.results[k] = grown
+
+    def recorded_results(self) -> dict:
+        """ Views of the records so far, one per half-turn along the first axis. """
+        return {k: v[:self.num_records] for k, v in self.results.items()}
 
-    def record_move(self, sign: int, move: str, pos: List[int], result: str, turn: int):
+    def record_move(self, sign: int, move: str, pos: List[int], result: Union[MoveResult, str], turn: int):
         board = self.board_info[sign]
-        result_code, result_remainder = result.split(' ', maxsplit=1) if ' ' in result else (result, None)
-        if result_code == 'error':
+        if isinstance(result, str):
+            result = MoveResult.from_string(result)
+        if result.code == RESULT_ERROR:
             return
         if move == 'scout':
-            vals_str = result.split(' ')[1]
-            vals = np.array([int(n) for n in vals_str.split(',')])
+            vals = np.array(result.scout, dtype=np.short)
             vals[vals * sign > 0] = 0  # only record opponent's squares
             top = max(pos[0] - 1, 0)
             bot = min(pos[0] + 2, 11)
@@ -71,17 +153,16 @@ class BoardStats:
         elif move == 'spray':
             board[pos[0], pos[1], 9] = board[pos[0], pos[1], 7]
             board[pos[0], pos[1], 10] = board[pos[0], pos[1], 8]
-            board[pos[0], pos[1], 7] = int(result_remainder)
+            board[pos[0], pos[1], 7] = result.value
             board[pos[0], pos[1], 8] = turn
         elif move == 'bomb':
             board[pos[0], pos[1], 5] = board[pos[0], pos[1], 3]
             board[pos[0], pos[1], 6] = board[pos[0], pos[1], 4]
-            board[pos[0], pos[1], 3] = int(result_remainder)
+            board[pos[0], pos[1], 3] = result.value
             board[pos[0], pos[1], 4] = turn
         elif move in ('plant', 'colonise'):
-            if result_remainder is not None and result_remainder[0:2] == "oc":
-                val = int(result_remainder.split(' ')[1])
-                board[pos[0], pos[1], 1] = val
+            if result.code == RESULT_OCCUPIED:
+                board[pos[0], pos[1], 1] = abs(result.value)
                 board[pos[0], pos[1], 2] = turn
         elif move == 'fertilise':
             pass
@@ -104,19 +185,25 @@ class BoardStats:
         if sign == 1:
             out_board_info = board[:, ::-1, :]
 
-        out_board_info = np.expand_dims(out_board_info, axis=-1)
-        self.results['board_info'] = np.concatenate((self.results['board_info'], out_board_info), axis=-1)
-
-        self.results['turn'] = np.append(self.results['turn'], turn)
-        self.results['sign'] = np.append(self.results['sign'], sign)
-
-        opp_board = np.expand_dims(opp_board, axis=-1)
-        self.results['opp_board'] = np.concatenate((self.results['opp_board'], opp_board), axis=-1)
+        if self.num_records == self.capacity:
+            self.grow_results()
+        i = self.num_records
+        self.results['board_info'][i] = out_board_info
+        self.results['turn'][i] = turn
+        self.results['sign'][i] = sign
+        self.results['opp_board'][i] = opp_board
+        self.num_records += 1
 
     def end_game(self):
+        if self.writer is not None:
+            self.writer.add_game(self.recorded_results())
+            self.num_records = 0
+            return
+
         nw = datetime.now()
         out_dir = f'out/{nw}'
         os.makedirs(out_dir)
-        for k, v in self.results.items():
+        for k, v in self.recorded_results().items():
             np.save(f'{out_dir}/{k}.npy', v)
-        self.init_results()
+        # the buffers are reused for the next game
+        self.num_records = 0
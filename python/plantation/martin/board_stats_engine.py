@@ -1,6 +1,7 @@
 from typing import List
 
 from plantation.engine import Engine
+from plantation.move_result import MoveResult
 from plantation.martin.board_stats import BoardStats
 
 
@@ -22,7 +23,7 @@ class BoardStatsEngine(Engine):
             pos: List[int],
             sign: int,
             moves_remaining: int,
-            result: str
+            result: MoveResult
     ):
         self.board_stats.record_move(sign, move, pos, result, self.turn)
 
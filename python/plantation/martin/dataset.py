@@ -0,0 +1,225 @@
+""" Sharded, memory-mapped storage for collected board statistics.
+
+consolidate() gathers the per-game .npy directories written by
+BoardStats.end_game, with records along either the first axis or, as the
+original BoardStats wrote them, the last (and HDF5 files written by
+BoardStatsWriter), into a directory of shards:
+
+    index.json              keys, dtypes and record shapes, and per-shard record counts
+    game_start.npy          first record of each game, over all shards
+    shard-00000-turn.npy    one .npy file per key and shard, records along the first axis
+    ...
+
+BoardStatsDataset opens the shards with np.load(mmap_mode='r'), so nothing
+is read until it is sliced. Slices within a shard are views of the memory
+map, and jax.numpy.asarray takes them as they are.
+"""
+from contextlib import contextmanager
+import glob
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import h5py
+import numpy as np
+
+from plantation.batching import shuffled_batches
+
+KEYS = ('board_info', 'opp_board', 'turn', 'sign')
+INDEX_FILE = 'index.json'
+GAME_START_FILE = 'game_start.npy'
+
+
+def shard_file(shard: int, key: str) -> str:
+    return f'shard-{shard:05d}-{key}.npy'
+
+
+def records_last(arrays: Dict[str, np.ndarray], source: str) -> bool:
+    """ Whether a BoardStats output directory has its records along the last
+    axis, as the original BoardStats wrote them, rather than the first. """
+    num_records = len(arrays['turn'])
+    opp_board = arrays['opp_board']
+    first, last = opp_board.shape[0] == num_records, opp_board.shape[-1] == num_records
+    if not (first or last):
+        raise ValueError(f"{source}: opp_board of shape {opp_board.shape} does not hold {num_records} records")
+    if first and last:
+        # e.g. 11 records of an 11x11 board: the opponent's tiles never have the mover's sign
+        signs = arrays['sign'][:, None, None]
+        return bool(np.all(np.moveaxis(opp_board, -1, 0) * signs <= 0)) and not bool(np.all(opp_board * signs <= 0))
+    return last
+
+
+@contextmanager
+def open_source(source: str) -> Iterator[Tuple[Dict, np.ndarray]]:
+    """ The arrays of a BoardStats output directory or BoardStatsWriter file,
+    with records along the first axis, and the first record of each game in
+    it. An HDF5 file is closed on leaving the context, after which its arrays
+    can no longer be read. """
+    if os.path.isdir(source):
+        arrays = {k: np.load(os.path.join(source, f'{k}.npy'), mmap_mode='r') for k in KEYS}
+        if records_last(arrays, source):
+            arrays = {k: np.moveaxis(v, -1, 0) for k, v in arrays.items()}
+        yield arrays, np.zeros(1, dtype=np.int64)
+    else:
+        with h5py.File(source, 'r') as f:
+            yield {k: f[k] for k in KEYS}, f['game_start'][:]
+
+
+def consolidate(sources: List[str], out_dir: str, shard_records: int = 1 << 16) -> 'BoardStatsDataset':
+    """ Copies the records of all sources into shards of up to shard_records
+    records each. A source is an out/<timestamp> directory or an .h5 file.
+
+    Sources are opened one at a time, as a long collection run leaves far
+    more of them than a process may have files open. """
+    keys = None
+    sizes = []
+    for source in sources:
+        with open_source(source) as (arrays, _game_start):
+            num_records = len(arrays['turn'])
+            source_keys = {k: {'dtype': arrays[k].dtype.str, 'shape': list(arrays[k].shape[1:])} for k in KEYS}
+        if num_records == 0:
+            continue
+        if keys is None:
+            keys = source_keys
+        elif source_keys != keys:
+            raise ValueError(f"{source} has records of {source_keys}, unlike the {keys} of the sources before it")
+        sizes.append((source, num_records))
+    if not sizes:
+        raise ValueError("No records to consolidate")
+
+    write_shards(sizes, keys, out_dir, shard_records)
+    return BoardStatsDataset(out_dir)
+
+
+def write_shards(sizes: List[Tuple[str, int]], keys: Dict, out_dir: str, shard_records: int):
+    """ Copies each (source, number of records) in turn into the shards. """
+    total = sum(num_records for _source, num_records in sizes)
+    shard_sizes = [min(shard_records, total - start) for start in range(0, total, shard_records)]
+
+    os.makedirs(out_dir, exist_ok=True)
+    game_starts = []
+    shard = -1
+    shard_arrays = {}
+    position = 0  # within the current shard
+    offset = 0  # over all shards
+    for source, num_records in sizes:
+        with open_source(source) as (arrays, game_start):
+            game_starts.append(game_start + offset)
+            copied = 0
+            while copied < num_records:
+                if shard < 0 or position == shard_sizes[shard]:
+                    for array in shard_arrays.values():
+                        array.flush()
+                    shard += 1
+                    position = 0
+                    shard_arrays = {
+                        k: np.lib.format.open_memmap(
+                            os.path.join(out_dir, shard_file(shard, k)),
+                            mode='w+',
+                            dtype=np.dtype(info['dtype']),
+                            shape=(shard_sizes[shard], ) + tuple(info['shape'])
+                        )
+                        for k, info in keys.items()
+                    }
+                count = min(num_records - copied, shard_sizes[shard] - position)
+                for k in KEYS:
+                    shard_arrays[k][position:position + count] = arrays[k][copied:copied + count]
+                copied += count
+                position += count
+        offset += num_records
+    for array in shard_arrays.values():
+        array.flush()
+
+    np.save(os.path.join(out_dir, GAME_START_FILE), np.concatenate(game_starts).astype(np.int64))
+    with open(os.path.join(out_dir, INDEX_FILE), 'w') as f:
+        json.dump({'keys': keys, 'shard_records': shard_sizes}, f, indent=2)
+
+
+def consolidate_out_dir(out_root: str, out_dir: str, shard_records: int = 1 << 16) -> 'BoardStatsDataset':
+    """ Consolidates everything BoardStats has written under out_root. """
+    sources = sorted(
+        path for path in glob.glob(os.path.join(out_root, '*'))
+        if os.path.isdir(path) or path.endswith('.h5')
+    )
+    return consolidate(sources, out_dir, shard_records)
+
+
+class BoardStatsDataset:
+    """ Read-only access to consolidated shards, one record per half-turn. """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.keys = list(index['keys'].keys())
+        self.shard_records = index['shard_records']
+        self.shard_offsets = np.cumsum([0] + self.shard_records)
+        self.game_start = np.load(os.path.join(path, GAME_START_FILE), mmap_mode='r')
+        self.shards = [
+            {k: np.load(os.path.join(path, shard_file(shard, k)), mmap_mode='r') for k in self.keys}
+            for shard in range(len(self.shard_records))
+        ]
+
+    def __len__(self) -> int:
+        return int(self.shard_offsets[-1])
+
+    @property
+    def num_games(self) -> int:
+        return len(self.game_start)
+
+    def locate(self, record: int) -> Tuple[int, int]:
+        """ The shard holding a record, and its position in that shard. """
+        shard = int(np.searchsorted(self.shard_offsets, record, side='right')) - 1
+        return shard, record - int(self.shard_offsets[shard])
+
+    def __getitem__(self, record: int) -> Dict[str, np.ndarray]:
+        shard, position = self.locate(record)
+        return {k: v[position] for k, v in self.shards[shard].items()}
+
+    def records(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """ Records start to stop. Within one shard these are views of the
+        memory map; across shards they are copied. """
+        shard, position = self.locate(start)
+        if stop - start <= self.shard_records[shard] - position:
+            return {k: v[position:position + stop - start] for k, v in self.shards[shard].items()}
+        parts = []
+        while start < stop:
+            shard, position = self.locate(start)
+            count = min(stop - start, self.shard_records[shard] - position)
+            parts.append({k: v[position:position + count] for k, v in self.shards[shard].items()})
+            start += count
+        return {k: np.concatenate([part[k] for part in parts]) for k in self.keys}
+
+    def game(self, game: int) -> Dict[str, np.ndarray]:
+        start = int(self.game_start[game])
+        stop = int(self.game_start[game + 1]) if game + 1 < self.num_games else len(self)
+        return self.records(start, stop)
+
+    def blocks(self, block_records: int, rng: np.random.Generator) -> List[Tuple[int, int]]:
+        """ (shard, start) of every block of contiguous records, in random order. """
+        blocks = [
+            (shard, start)
+            for shard, num_records in enumerate(self.shard_records)
+            for start in range(0, num_records, block_records)
+        ]
+        return [blocks[i] for i in rng.permutation(len(blocks))]
+
+    def batches(
+            self,
+            batch_size: int,
+            shuffle_buffer: int = 1 << 15,
+            block_records: int = 1024,
+            rng: Optional[np.random.Generator] = None,
+            drop_last: bool = True
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """ Shuffled minibatches for one pass over the data.
+
+        Blocks of contiguous records are read in random order into a buffer of
+        shuffle_buffer records, and each batch is drawn at random from the
+        buffer. Memory use is bounded by the buffer, whatever the dataset size.
+        """
+        rng = np.random.default_rng(rng)
+        blocks = (
+            {k: v[start:start + block_records] for k, v in self.shards[shard].items()}
+            for shard, start in self.blocks(block_records, rng)
+        )
+        return shuffled_batches(blocks, batch_size, shuffle_buffer, rng, drop_last)
@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from plantation.engine import Engine
+from plantation.include import SeedLike, child_seed
+from plantation.player import Player
+
+# a picklable callable that builds a fresh player, e.g.
+# functools.partial(ScryAndDie, name="Vaarsuvius")
+PlayerFactory = Callable[[], Player]
+
+
+class GameResult(NamedTuple):
+    game: int
+    player_p: str
+    player_m: str
+    score: float
+
+
+def make_engine(engine_kwargs: Dict) -> Engine:
+    engine = Engine(**engine_kwargs)
+    engine.output = None
+    return engine
+
+
+def play_game(
+        engine: Engine,
+        game: int,
+        player_p: Player,
+        player_m: Player,
+        seed: Optional[SeedLike] = None
+) -> GameResult:
+    score = engine.run_game(player_handler_p=player_p, player_handler_m=player_m, seed=seed)
+    return GameResult(game, player_p.name, player_m.name, score)
+
+
+# per-process state for pool workers, set up once by _init_match_worker
+_worker_engine: Optional[Engine] = None
+_worker_players: List[Player] = []
+_worker_seed: Optional[SeedLike] = None
+
+
+def _init_match_worker(
+        engine_kwargs: Dict,
+        factory_a: PlayerFactory,
+        factory_b: PlayerFactory,
+        seed: Optional[SeedLike] = None
+):
+    global _worker_engine, _worker_players, _worker_seed
+    _worker_engine = make_engine(engine_kwargs)
+    _worker_players = [factory_a(), factory_b()]
+    _worker_seed = seed
+
+
+def _play_match_game(game: int) -> GameResult:
+    player_a, player_b = _worker_players
+    # a game's streams depend only on the match seed and the game number,
+    # not on which worker plays it
+    seed = child_seed(_worker_seed, game) if _worker_seed is not None else None
+    # players swap seats every game, so each gets the same number of first turns
+    if game % 2 == 0:
+        return play_game(_worker_engine, game, player_a, player_b, seed)
+    else:
+        return play_game(_worker_engine, game, player_b, player_a, seed)
+
+
+def run_match(
+        factory_a: PlayerFactory,
+        factory_b: PlayerFactory,
+        num_games: int,
+        engine_kwargs: Dict,
+        processes: Optional[int] = None,
+        seed: Optional[SeedLike] = None
+) -> Iterator[GameResult]:
+    """ Plays a match across a pool of worker processes.
+
+    Each worker builds its own Engine and its own pair of players, which it
+    keeps for all the games it plays. Results are yielded as games finish,
+    so they are not in game order. Player A takes the + seat in even games
+    and the - seat in odd games.
+
+    With a seed, every game is reproducible whatever the number of processes,
+    as long as the players reset any state they keep between games.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(min(processes, num_games), 1)
+
+    if processes == 1:
+        _init_match_worker(engine_kwargs, factory_a, factory_b, seed)
+        for game in range(num_games):
+            yield _play_match_game(game)
+        return
+
+    with multiprocessing.Pool(
+            processes,
+            initializer=_init_match_worker,
+            initargs=(engine_kwargs, factory_a, factory_b, seed)
+    ) as pool:
+        yield from pool.imap_unordered(_play_match_game, range(num_games))
+
+
+class MatchStats:
+    """ Wins by seat, with player A in the + seat in even games as in
+    run_match. Results are told apart by game number rather than by name, as
+    a player built without a name gets a different one in each worker. """
+
+    def __init__(self):
+        self.name_a = None
+        self.name_b = None
+        self.wins = {'a': [], 'b': [], 'draw': []}
+        self.timeouts = []
+
+    def add(self, result: GameResult):
+        a_is_p = result.game % 2 == 0
+        if self.name_a is None:
+            self.name_a = result.player_p if a_is_p else result.player_m
+            self.name_b = result.player_m if a_is_p else result.player_p
+        seat_p, seat_m = ('a', 'b') if a_is_p else ('b', 'a')
+
+        score = result.score
+        if score > 0:
+            self.wins[seat_p].append(abs(score))
+        elif score < 0:
+            self.wins[seat_m].append(abs(score))
+        else:
+            self.wins['draw'].append(0)
+
+        if score == 100:
+            self.timeouts.append(self.seat_name(seat_m))
+        elif score == -100:
+            self.timeouts.append(self.seat_name(seat_p))
+
+    def seat_name(self, seat: str) -> str:
+        return self.name_a if seat == 'a' else self.name_b
+
+    def print_summary(self):
+        name_a, name_b, wins = self.name_a, self.name_b, self.wins
+        signed_scores = wins['a'] + [-x for x in wins['b']]
+
+        a_wins = len(wins['a'])
+        b_wins = len(wins['b'])
+        if a_wins > b_wins:
+            print(f"{name_a} is the winner!!")
+        elif b_wins > a_wins:
+            print(f"{name_b} is the winner!!")
+        else:
+            print(f"It is a draw")
+
+        print(f"{name_a} wins: {a_wins}")
+        print(f"{name_b} wins: {b_wins}")
+        print(f"Draws: {len(wins['draw'])}")
+        print()
+        print("Detailed results:")
+        print(f"{name_a} wins: \n{wins['a']}\n")
+        print(f"{name_b} wins: \n{wins['b']}")
+
+        print(f"Average score, if we count scores for {name_b} as negative: "
+              f"{np.mean(signed_scores):.2f}, (sigma: {np.std(signed_scores):.2f})")
@@ -0,0 +1,65 @@
+from typing import Optional
+
+import numpy as np
+
+from plantation.include import RESULT_OK, RESULT_ERROR, RESULT_OCCUPIED
+
+RESULT_NAMES = {
+    RESULT_OK: 'OK',
+    RESULT_ERROR: 'error',
+    RESULT_OCCUPIED: 'occupied',
+}
+RESULT_CODES = {name: code for code, name in RESULT_NAMES.items()}
+
+
+class MoveResult:
+    """ The outcome of a move, without going through the text protocol.
+
+    code is one of the `include.RESULT_*` codes. value is the opponent's score
+    for "occupied", the tiles or levels hit for spray/bomb, and None otherwise.
+    scout holds the scouted tile values for scout (clipped at the board edge),
+    in row-major order. str() gives the legacy result string, e.g. "OK 3".
+    """
+
+    __slots__ = ('code', 'value', 'scout')
+
+    def __init__(self, code: int, value: Optional[int] = None, scout: Optional[np.ndarray] = None):
+        self.code = code
+        self.value = value
+        self.scout = scout
+
+    def __str__(self) -> str:
+        name = RESULT_NAMES[self.code]
+        if self.scout is not None:
+            return name + " " + ",".join([str(x) for x in self.scout.ravel()])
+        elif self.value is not None:
+            return f"{name} {self.value}"
+        return name
+
+    def __repr__(self) -> str:
+        return f"MoveResult({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, str):
+            return str(self) == other
+        if not isinstance(other, MoveResult):
+            return NotImplemented
+        return str(self) == str(other)
+
+    __hash__ = None
+
+    @classmethod
+    def from_string(cls, result: str) -> 'MoveResult':
+        """ Parses a legacy result string. Scout values come back flat. """
+        name, _, remainder = result.partition(' ')
+        code = RESULT_CODES[name]
+        if remainder == '':
+            return cls(code)
+        elif ',' in remainder:
+            return cls(code, scout=np.array([int(n) for n in remainder.split(',')], dtype=np.short))
+        return cls(code, int(remainder))
+
+
+# shared instances for the results that carry no data; treat as immutable
+OK = MoveResult(RESULT_OK)
+ERROR = MoveResult(RESULT_ERROR)
@@ -0,0 +1,164 @@
+import asyncio
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from plantation import bot_protocol as protocol
+from plantation.async_player import AsyncPlayer, BotConnection
+from plantation.move_result import MoveResult
+
+
+class MultiplexedBot:
+    """ One bot process playing many games at once, for AsyncEngine.
+
+    Each game gets its own SessionPlayer from player(). Move requests made by
+    different games in the same pass of the event loop go to the bot together
+    in one GET_MOVE_BATCH message, and come back together in one MOVE_BATCH reply.
+
+    Moves in a batch are worked out one after another, so waiting for the
+    reply would charge each game for the whole batch. Instead a game is
+    charged the time the bot reports for its move, capped at how long the
+    game actually waited.
+    """
+
+    def __init__(self, name: str, command: List[str], cwd: Optional[str] = None):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.transport = None
+        self.connection = None
+        self.stdin = None
+        self.reader = None
+        self.next_session = 0
+        # moves waiting to be sent, and moves sent and waiting for a reply
+        self.queued: List[Tuple[int, bytes]] = []
+        self.waiting: Dict[int, Tuple[asyncio.Future, float]] = {}
+
+    async def start(self) -> 'MultiplexedBot':
+        loop = asyncio.get_running_loop()
+        self.transport, self.connection = await loop.subprocess_exec(
+            BotConnection, *self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=None, cwd=self.cwd
+        )
+        self.stdin = self.transport.get_pipe_transport(0)
+        self.send(protocol.INIT, self.name.encode())
+        _arrival_time, msg_type, _body = await self.connection.frames.get()
+        if msg_type != protocol.READY:
+            raise EOFError(f"{self.name} did not start")
+        self.reader = asyncio.create_task(self.read_moves())
+        return self
+
+    def player(self) -> 'SessionPlayer':
+        self.next_session += 1
+        return SessionPlayer(self, self.next_session)
+
+    def send(self, msg_type: int, body: bytes = b'') -> None:
+        protocol.write_frame(self.stdin, msg_type, body)
+
+    def request_move(self, session: int, body: bytes) -> asyncio.Future:
+        if not self.queued:
+            asyncio.get_running_loop().call_soon(self.send_moves)
+        future = asyncio.get_running_loop().create_future()
+        self.queued.append((session, body))
+        self.waiting[session] = (future, 0.)
+        return future
+
+    def send_moves(self) -> None:
+        self.send(protocol.GET_MOVE_BATCH, protocol.pack_get_move_batch(self.queued))
+        sent_time = time.perf_counter()
+        for session, _body in self.queued:
+            self.waiting[session] = (self.waiting[session][0], sent_time)
+        self.queued = []
+
+    async def read_moves(self) -> None:
+        try:
+            while True:
+                arrival_time, msg_type, body = await self.connection.frames.get()
+                if msg_type is None:
+                    break
+                if msg_type != protocol.MOVE_BATCH:
+                    raise ValueError(f"{self.name} sent message type {msg_type} during get_move")
+                for session, time_taken, move, pos in protocol.unpack_move_batch(body):
+                    future, sent_time = self.waiting.pop(session)
+                    if not future.cancelled():
+                        future.set_result((move, pos, min(time_taken, arrival_time - sent_time)))
+        finally:
+            # nothing more is coming, so fail any games still waiting
+            for future, _sent_time in self.waiting.values():
+                if not future.done():
+                    future.set_exception(EOFError(f"{self.name} stopped answering during get_move"))
+            self.waiting = {}
+
+    async def close(self, timeout: float = 5.0):
+        """ Closes the bot's stdin, so it can finish up, and waits for it to exit. """
+        if self.transport is None:
+            return
+        self.stdin.close()
+        try:
+            await asyncio.wait_for(self.reader, timeout)
+        except (asyncio.TimeoutError, ValueError):
+            self.transport.kill()
+        self.transport.close()
+        self.transport = None
+
+
+class SessionPlayer(AsyncPlayer):
+    """ One game's view of a MultiplexedBot. """
+
+    structured_results = True
+
+    def __init__(self, bot: MultiplexedBot, session: int):
+        super().__init__(bot.name)
+        self.bot = bot
+        self.session = session
+        self.session_header = protocol.SESSION.pack(session)
+        self.session_open = False
+
+    def start_game(self, board_shape: Tuple[int], sign: int):
+        super().start_game(board_shape, sign)
+        self.session_open = True
+        self.bot.send(
+            protocol.OPEN_SESSION,
+            self.session_header + protocol.START_GAME_BODY.pack(sign, board_shape[0], board_shape[1])
+        )
+
+    async def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+        move, pos, _time_taken = await self.timed_get_move(board, turn, moves_remaining, time_remaining)
+        return move, pos
+
+    async def timed_get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int], float]:
+        return await self.bot.request_move(
+            self.session, protocol.pack_get_move(board, turn, moves_remaining, time_remaining)
+        )
+
+    def handle_move_result(self, move: str, turn: int, pos: List[int], result: MoveResult):
+        self.bot.send(protocol.SESSION_RESULT, self.session_header + protocol.pack_move_result(move, turn, pos, result))
+
+    def end_game(self, your_score: int, opponent_score: int):
+        self.close_session(your_score, opponent_score)
+
+    def game_over(self):
+        # a game that ended without end_game, e.g. on a timeout, still has its
+        # session open in the bot, so close it with no scores
+        if self.session_open:
+            self.close_session(0, 0)
+
+    def close_session(self, your_score: int, opponent_score: int):
+        self.session_open = False
+        self.bot.send(
+            protocol.CLOSE_SESSION,
+            self.session_header + protocol.END_GAME_BODY.pack(int(your_score), int(opponent_score))
+        )
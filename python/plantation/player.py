@@ -3,16 +3,42 @@ import numpy as np
 import random
 import string
 
+from plantation.bitboard import BitBoard
+from plantation.include import SeedLike, make_rngs
+from plantation.legal_moves import LegalMoves, compute_legal_moves
+
 
 class Player:
     sign = 0
     name = "Player"
+    # set to True to receive MoveResult objects in handle_move_result
+    # rather than result strings such as "OK 3"
+    structured_results = False
+    # get_move is given a read-only view of the player's board, which the
+    # engine updates in place. Set to True to get a fresh copy each move instead,
+    # e.g. if the player modifies the board or keeps it between moves
+    copy_board = False
+    # set to True to have the engine keep self.bitboard, a BitBoard of this
+    # player's tiles, up to date through the game
+    use_bitboard = False
+    bitboard = None
+    # set by the engine to a callable giving LegalMoves for a number of moves remaining
+    legal_move_source = None
+    # random streams for the player's choices. These are the global ones until
+    # seed() is called, which the engine does for games run with a seed
+    rng = random
+    np_rng = np.random
 
     def __init__(self, name: Optional[str] = None):
         if name is not None:
             self.name = name
         else:
-            self.name = "Player " + random.choice(string.ascii_lowercase)
+            self.name = "Player " + self.rng.choice(string.ascii_lowercase)
+
+    def seed(self, seed: SeedLike):
+        """ Gives the player its own random streams. Players that keep other
+        state between games need to reset it for games to be reproducible. """
+        self.rng, self.np_rng = make_rngs(seed)
 
     def end_game(self, your_score: int, opponent_score: int):
         pass
@@ -32,3 +58,15 @@ class Player:
 
     def handle_move_result(self, move, turn, pos, result):
         pass
+
+    def get_legal_moves(self, board: np.ndarray, moves_remaining: int) -> LegalMoves:
+        """ Legal moves from the engine's shared cache if there is one, otherwise computed from the board. """
+        if self.legal_move_source is not None:
+            return self.legal_move_source(moves_remaining)
+        return compute_legal_moves(board, moves_remaining, self.bitboard)
+
+    def get_bitboard(self, board: np.ndarray) -> BitBoard:
+        """ The engine-maintained bitboard if there is one, otherwise one built from the board. """
+        if self.bitboard is not None:
+            return self.bitboard
+        return BitBoard.from_board(board, self.sign)
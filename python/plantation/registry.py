@@ -0,0 +1,83 @@
+""" Bots by name, imported only when a game needs them.
+
+The bots in this repo are listed in BUILTIN_BOTS. Other packages can add
+bots through the `plantation.bots` entry point group, e.g. in pyproject.toml
+
+    [tool.poetry.plugins."plantation.bots"]
+    my-bot = "my_package.my_bot:MyBot"
+
+Listing bots only reads names and "module:attribute" strings; a bot's module
+is imported the first time a player is built from it.
+"""
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
+
+if TYPE_CHECKING:
+    from plantation.player import Player
+
+ENTRY_POINT_GROUP = 'plantation.bots'
+
+BUILTIN_BOTS = {
+    'random': 'plantation.ai_players.random_player:RandomPlayer',
+    'random-dumb': 'plantation.ai_players.random_player_dumb:RandomPlayerDumb',
+    'scry-and-die': 'plantation.ai_players.scry_and_die:ScryAndDie',
+    'mcts': 'plantation.ai_players.mcts_player:MCTSPlayer',
+    'human': 'plantation.ai_players.human:HumanPlayer',
+    'php': 'plantation.ai_players.paulc.php_player_wrapper:PHPPlayerWrapper',
+    'php-binary': 'plantation.ai_players.paulc.php_player_wrapper:PHPBinaryPlayer',
+}
+
+# keyword arguments a bot needs that have no default in its class
+BOT_DEFAULTS = {
+    'random': {'move_probabilities': None},
+    'php': {'php_file': 'genetic.php'},
+    'php-binary': {'php_file': 'genetic.php'},
+}
+
+_bots: Optional[Dict[str, str]] = None
+_loaded: Dict[str, Type['Player']] = {}
+
+
+def available_bots() -> Dict[str, str]:
+    """ Bot names and where they live, as "module:attribute". Plugins can
+    replace built-in bots of the same name. """
+    global _bots
+    if _bots is None:
+        _bots = dict(BUILTIN_BOTS)
+        _bots.update((entry.name, entry.value) for entry in entry_points(group=ENTRY_POINT_GROUP))
+    return _bots
+
+
+def load_bot(bot: str) -> Type['Player']:
+    """ The player class registered as bot, importing its module if need be. """
+    if bot not in _loaded:
+        bots = available_bots()
+        if bot not in bots:
+            raise KeyError(f"Unknown bot {bot!r}, expected one of: {', '.join(sorted(bots))}")
+        module_name, _, attribute = bots[bot].partition(':')
+        player_class = import_module(module_name)
+        for name in attribute.split('.'):
+            player_class = getattr(player_class, name)
+        _loaded[bot] = player_class
+    return _loaded[bot]
+
+
+class BotFactory:
+    """ A picklable player factory for run_match and run_tournament that holds
+    only the bot's name, so the bot is imported in the process that plays it. """
+
+    def __init__(self, bot: str, **kwargs: Any):
+        self.bot = bot
+        self.kwargs = dict(BOT_DEFAULTS.get(bot, {}), **kwargs)
+        self.kwargs.setdefault('name', bot)
+
+    @property
+    def name(self) -> str:
+        return self.kwargs['name']
+
+    def __call__(self) -> 'Player':
+        return load_bot(self.bot)(**self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"BotFactory({self.bot!r}, {', '.join(f'{k}={v!r}' for k, v in self.kwargs.items())})"
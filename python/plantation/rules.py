@@ -0,0 +1,205 @@
+from typing import List
+
+from plantation.bitboard import BitBoard
+from plantation.include import RESULT_OK, RESULT_OCCUPIED
+from plantation.move_result import MoveResult, OK, ERROR
+
+
+class Rules:
+    """ The move rules, applied to self.board.
+
+    Shared by Engine, which adds players, clocks and logging on top, and by
+    GameState, which adds undo for search. Every board change goes through
+    set_tile, which subclasses extend to keep their own derived state.
+    """
+
+    moves_required = {
+        'fertilise': 1,
+        'plant': 1,
+        'scout': 1,
+        'colonise': 2,
+        'spray': 2,
+        'bomb': 2
+    }
+    bomb_damage = 4
+    output = None
+    outfile = None
+
+    board = None
+    # running score totals, kept in step with the board by set_tile
+    total_p = 0
+    total_m = 0
+    # BitBoard per player, only kept when bitboards are in use
+    bitboards = {}
+
+    def set_tile(self, row: int, col: int, value: int) -> None:
+        """ Sets a tile on the board. All board changes made by moves go
+        through here, so that derived state stays up to date. """
+        old_value = self.board[row, col]
+        self.board[row, col] = value
+
+        if old_value > 0:
+            self.total_p -= int(old_value)
+        elif old_value < 0:
+            self.total_m -= int(old_value)
+        if value > 0:
+            self.total_p += int(value)
+        elif value < 0:
+            self.total_m += int(value)
+
+        if self.bitboards:
+            self.bitboards[1].set_score(row, col, value)
+            self.bitboards[-1].set_score(row, col, -value)
+
+    def do_fertilise(self, pos: List[int], sign: int) -> MoveResult:
+        board = self.board
+        row, col = pos[0], pos[1]
+        if sign * board[row, col] > 0:
+            self.set_tile(row, col, board[row, col] + sign)
+            return OK
+        else:
+            if self.output:
+                self.vprint("do_fertilise: tile not owned by player")
+            return ERROR
+
+    def do_plant(self, pos: List[int], sign: int) -> MoveResult:
+        board = self.board
+
+        row, col = pos[0], pos[1]
+        if board[row, col] * sign > 0:
+            if self.output:
+                self.vprint("do_plant: target tile already owned by player")
+            return ERROR
+        elif board[row, col] * sign < 0:
+            return MoveResult(RESULT_OCCUPIED, int(board[row, col]))
+
+        # now we know that board[row, col] == 0
+        if self.bitboards:
+            if self.bitboards[sign].is_adjacent(row, col):
+                self.set_tile(row, col, sign)
+                return OK
+            if self.output:
+                self.vprint("do_plant: no adjacent tiles owned by player")
+            return ERROR
+
+        for delta_r, delta_c in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            test_row = row + delta_r
+            test_col = col + delta_c
+            if 0 <= test_row < board.shape[0] and 0 <= test_col < board.shape[1]:
+                if board[test_row, test_col] * sign > 0:
+                    self.set_tile(row, col, sign)
+                    return OK
+
+        if self.output:
+            self.vprint("do_plant: no adjacent tiles owned by player")
+        return ERROR
+
+    def do_scout(self, pos: List[int], _sign: int) -> MoveResult:
+        board = self.board
+
+        row, col = pos[0], pos[1]
+        top = max(row - 1, 0)
+        left = max(col - 1, 0)
+        return MoveResult(RESULT_OK, scout=board[top:row + 2, left:col + 2].copy())
+
+    def do_colonise(self, pos: List[int], sign: int) -> MoveResult:
+        board = self.board
+
+        row, col, source_row, source_col = pos[0], pos[1], pos[2], pos[3]
+        if board[row, col] * sign > 0:
+            if self.output:
+                self.vprint("do_colonise: target tile already owned by player")
+            return ERROR
+        elif board[source_row, source_col] * sign < 2:
+            if self.output:
+                self.vprint("do_colonise: source tile count less than 2")
+            return ERROR
+
+        elif board[row, col] * sign < 0:
+            return MoveResult(RESULT_OCCUPIED, int(board[row, col]))
+        else:
+            self.set_tile(row, col, sign)
+            self.set_tile(source_row, source_col, board[source_row, source_col] - sign)
+            return OK
+
+    def do_spray(self, pos: List[int], sign: int) -> MoveResult:
+        board = self.board
+
+        row, col = pos[0], pos[1]
+        if self.bitboards:
+            hits = self.bitboards[-sign].cross(row, col) & self.bitboards[-sign].owned
+            for test_row, test_col in self.bitboards[-sign].to_list(hits):
+                self.set_tile(test_row, test_col, board[test_row, test_col] + sign)
+            return MoveResult(RESULT_OK, BitBoard.count(hits))
+
+        total = 0
+        for delta_r, delta_c in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
+            test_row = row + delta_r
+            test_col = col + delta_c
+            if 0 <= test_row < board.shape[0] and 0 <= test_col < board.shape[1]:
+                if board[test_row, test_col] * sign < 0:
+                    self.set_tile(test_row, test_col, board[test_row, test_col] + sign)
+                    total += 1
+        return MoveResult(RESULT_OK, total)
+
+    def do_bomb(self, pos: List[int], sign: int) -> MoveResult:
+        board = self.board
+
+        row, col = pos[0], pos[1]
+        if board[row, col] * sign > 0:
+            if self.output:
+                self.vprint(f"do_bomb: target tile owned by player")
+            return ERROR
+        else:
+            levels_reduced = min(abs(int(board[row, col])), self.bomb_damage)
+            if levels_reduced > 0:
+                self.set_tile(row, col, board[row, col] + sign * levels_reduced)
+            return MoveResult(RESULT_OK, levels_reduced)
+
+    def do_move(
+            self,
+            move: str,
+            pos: List[int],
+            sign: int,
+            moves_remaining: int,
+    ) -> MoveResult:
+        board = self.board
+        if len(pos) < 2:
+            if self.output:
+                self.vprint(f"Invalid position: {pos}")
+            return ERROR
+        row, col = pos[0], pos[1]
+        if row < 0 or row >= board.shape[0] or col < 0 or col >= board.shape[1]:
+            if self.output:
+                self.vprint(f"Invalid location: ({row}, {col})")
+            return ERROR
+        if move not in self.moves_required:
+            if self.output:
+                self.vprint(f"Invalid move: {move}")
+            return ERROR
+        if self.moves_required[move] > moves_remaining:
+            if self.output:
+                self.vprint(f"Not enough moves remaining for {move}")
+            return ERROR
+
+        if move == 'fertilise':
+            return self.do_fertilise(pos, sign)
+        elif move == 'plant':
+            return self.do_plant(pos, sign)
+        elif move == 'scout':
+            return self.do_scout(pos, sign)
+        elif move == 'colonise':
+            return self.do_colonise(pos, sign)
+        elif move == 'spray':
+            return self.do_spray(pos, sign)
+        else:  # move == 'bomb':
+            return self.do_bomb(pos, sign)
+
+    def vprint(self, *args, **kwargs):
+        if not self.output:
+            return
+        elif self.output == "stdout":
+            print(*args, **kwargs)
+        else:
+            kwargs['file'] = self.outfile
+            print(*args, **kwargs)
@@ -0,0 +1,239 @@
+""" Training data streamed from games played in background processes.
+
+self_play_batches() plays games between two bots in worker processes and
+yields fixed-size batches of the moves made in them, as dicts of arrays with
+one record per move:
+
+    board            (rows, cols) int16, the mover's restricted board before
+                     the move, with their own tiles as positive counts
+    mask             (rows, cols, len(MOVES)) bool, LegalMoves.action_mask
+    move             int8, the move code in include.MOVES, or -1 if invalid
+    pos              (4, ) int8, row, col, source_row, source_col, -128 where absent
+    turn             int16
+    moves_remaining  int8, before the move
+    result           int8, the include.RESULT_* code
+    value            int16, the result value, or 0 if it has none
+    outcome          int16, the final score margin from the mover's side
+
+Games lost on time are left out: their boards are cut short, and their
+outcome is the forfeit rather than the score. Finished games go through a
+bounded queue, so workers wait rather than run ahead of training, and
+nothing is written to disk.
+"""
+from itertools import count
+import multiprocessing
+import os
+import queue
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from plantation.batching import shuffled_batches
+from plantation.engine import Engine
+from plantation.include import MOVE_CODES, SeedLike, child_seed, encode_pos
+from plantation.match import PlayerFactory
+from plantation.move_result import MoveResult
+from plantation.player import Player
+
+KEYS = ('board', 'mask', 'move', 'pos', 'turn', 'moves_remaining', 'result', 'value', 'outcome')
+
+
+class SelfPlayEngine(Engine):
+    """ An Engine that records what each mover could see and what they did.
+    The records of each finished game are left in self.games. """
+
+    output = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.games: List[Dict[str, np.ndarray]] = []
+        self.records = []
+        self.before_move = None
+
+    def at_start_of_game_action(self):
+        self.records = []
+
+    def apply_player_move(
+            self,
+            player_handler: Player,
+            move: str,
+            pos: List[int],
+            sign: int,
+            moves_remaining: int
+    ) -> int:
+        legal_moves = self.legal_moves(sign, moves_remaining)
+        self.before_move = (self.player_boards[sign] * sign, legal_moves.action_mask(self.board.shape))
+        return super().apply_player_move(player_handler, move, pos, sign, moves_remaining)
+
+    def after_move_action(
+            self,
+            move: str,
+            pos: List[int],
+            sign: int,
+            moves_remaining: int,
+            result: MoveResult
+    ):
+        board, mask = self.before_move
+        value = result.value if result.value is not None else 0
+        self.records.append(
+            (board, mask, MOVE_CODES.get(move, -1), encode_pos(pos), self.turn, moves_remaining, result.code, value, sign)
+        )
+
+    def end_of_game(
+            self,
+            p_score: int,
+            m_score: int,
+            player_handler_p: Player,
+            player_handler_m: Player,
+            time_p: float,
+            time_m: float
+    ):
+        super().end_of_game(p_score, m_score, player_handler_p, player_handler_m, time_p, time_m)
+        records, self.records = self.records, []
+        if time_p < 0 or time_m < 0:
+            return
+        board, mask, move, pos, turn, moves_remaining, result, value, sign = zip(*records)
+        self.games.append({
+            'board': np.array(board, dtype=np.int16),
+            'mask': np.array(mask),
+            'move': np.array(move, dtype=np.int8),
+            'pos': np.array(pos, dtype=np.int8),
+            'turn': np.array(turn, dtype=np.int16),
+            'moves_remaining': np.array(moves_remaining, dtype=np.int8),
+            'result': np.array(result, dtype=np.int8),
+            'value': np.array(value, dtype=np.int16),
+            'outcome': np.array(sign, dtype=np.int16) * (p_score + m_score),
+        })
+
+
+def play_games(
+        engine: SelfPlayEngine,
+        player_a: Player,
+        player_b: Player,
+        games: Iterator[int],
+        seed: Optional[SeedLike] = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """ Plays the numbered games, with the players swapping seats every game
+    as in run_match, and yields the records of each that was not lost on time. """
+    for game in games:
+        game_seed = child_seed(seed, game) if seed is not None else None
+        if game % 2 == 0:
+            engine.run_game(player_a, player_b, game_seed)
+        else:
+            engine.run_game(player_b, player_a, game_seed)
+        if engine.games:
+            yield engine.games.pop()
+
+
+def _self_play_worker(
+        games: multiprocessing.Queue,
+        stop: multiprocessing.Event,
+        worker: int,
+        processes: int,
+        num_games: Optional[int],
+        engine_kwargs: Dict,
+        factory_a: PlayerFactory,
+        factory_b: PlayerFactory,
+        seed: Optional[SeedLike]
+):
+    # worker w plays games w, w + processes, ..., so every game is played once
+    numbers = range(worker, num_games, processes) if num_games is not None else count(worker, processes)
+    for records in play_games(SelfPlayEngine(**engine_kwargs), factory_a(), factory_b(), iter(numbers), seed):
+        if stop.is_set():
+            break
+        games.put(records)
+    games.put(None)
+
+
+def self_play_games(
+        factory_a: PlayerFactory,
+        factory_b: PlayerFactory,
+        engine_kwargs: Dict,
+        num_games: Optional[int] = None,
+        processes: Optional[int] = None,
+        queue_games: int = 16,
+        seed: Optional[SeedLike] = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """ The records of each game, as games finish, forever if num_games is None.
+    Games lost on time are played but not yielded.
+
+    With processes=0 the games are played in this process, one at a time as
+    they are asked for. Otherwise each worker process builds its own pair of
+    players, and up to queue_games finished games wait for the consumer.
+    Workers are spawned, so the calling script needs the usual
+    `if __name__ == '__main__':` guard.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 0:
+        numbers = range(num_games) if num_games is not None else count()
+        engine = SelfPlayEngine(**engine_kwargs)
+        yield from play_games(engine, factory_a(), factory_b(), iter(numbers), seed)
+        return
+
+    # spawn rather than fork, as the consumer is often a multithreaded
+    # training process, e.g. with JAX, that is not safe to fork
+    context = multiprocessing.get_context('spawn')
+    games = context.Queue(queue_games)
+    stop = context.Event()
+    workers = [
+        context.Process(
+            target=_self_play_worker,
+            args=(games, stop, worker, processes, num_games, engine_kwargs, factory_a, factory_b, seed),
+            daemon=True
+        )
+        for worker in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = len(workers)
+    try:
+        while running > 0:
+            # checked every time, as the other workers may keep the queue busy
+            if any(worker.exitcode for worker in workers):
+                raise RuntimeError("A self-play worker failed, see its traceback above")
+            try:
+                records = games.get(timeout=1.)
+            except queue.Empty:
+                continue
+            if records is None:
+                running -= 1
+            else:
+                yield records
+    finally:
+        # the consumer may have stopped early: let the workers finish their
+        # games, taking anything they put so that none is stuck on a full queue
+        stop.set()
+        while running > 0:
+            try:
+                if games.get(timeout=5.) is None:
+                    running -= 1
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.join(1.)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def self_play_batches(
+        factory_a: PlayerFactory,
+        factory_b: PlayerFactory,
+        batch_size: int,
+        engine_kwargs: Dict,
+        num_games: Optional[int] = None,
+        processes: Optional[int] = None,
+        queue_games: int = 16,
+        shuffle_buffer: int = 1 << 14,
+        seed: Optional[SeedLike] = None,
+        rng: Optional[np.random.Generator] = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """ Fixed-size batches of move records from self_play_games, drawn at
+    random from a buffer of shuffle_buffer records so that a batch mixes moves
+    from many games. Only whole batches are yielded. """
+    games = self_play_games(factory_a, factory_b, engine_kwargs, num_games, processes, queue_games, seed)
+    try:
+        yield from shuffled_batches(games, batch_size, shuffle_buffer, rng)
+    finally:
+        games.close()
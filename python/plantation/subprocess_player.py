@@ -0,0 +1,82 @@
+import subprocess
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from plantation import bot_protocol as protocol
+from plantation.move_result import MoveResult
+from plantation.player import Player
+
+
+class SubprocessPlayer(Player):
+    """ A player whose moves come from a separate process, in any language.
+
+    The process talks the protocol in bot_protocol over its stdin and stdout.
+    Only get_move waits for a reply: the other messages are buffered and go
+    out with the next get_move, or at the end of the game.
+    """
+
+    structured_results = True
+    process = None
+    ready = False
+
+    def __init__(self, name: str, command: List[str], cwd: Optional[str] = None):
+        super().__init__(name)
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd)
+        # the bot starts up in the background; start_game waits for it
+        self.send(protocol.INIT, name.encode(), flush=True)
+
+    def wait_ready(self) -> None:
+        if not self.ready:
+            self.receive(protocol.READY, "start-up")
+            self.ready = True
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, msg_type: int, body: bytes = b'', flush: bool = False) -> None:
+        protocol.write_frame(self.process.stdin, msg_type, body)
+        if flush:
+            self.process.stdin.flush()
+
+    def receive(self, expected_type: int, during: str) -> bytes:
+        frame = protocol.read_frame(self.process.stdout)
+        if frame is None:
+            raise EOFError(f"{self.name} exited during {during}")
+        msg_type, body = frame
+        if msg_type != expected_type:
+            raise ValueError(f"{self.name} sent message type {msg_type} during {during}")
+        return body
+
+    def start_game(self, board_shape: Tuple[int], sign: int):
+        super().start_game(board_shape, sign)
+        self.wait_ready()
+        self.send(protocol.START_GAME, protocol.START_GAME_BODY.pack(sign, board_shape[0], board_shape[1]))
+
+    def get_move(
+            self,
+            board: np.ndarray,
+            turn: int,
+            moves_remaining: int,
+            time_remaining: float,
+    ) -> Tuple[str, List[int]]:
+        self.send(protocol.GET_MOVE, protocol.pack_get_move(board, turn, moves_remaining, time_remaining), flush=True)
+        return protocol.unpack_move(self.receive(protocol.MOVE, "get_move"))
+
+    def handle_move_result(self, move: str, turn: int, pos: List[int], result: MoveResult):
+        self.send(protocol.MOVE_RESULT, protocol.pack_move_result(move, turn, pos, result))
+
+    def end_game(self, your_score: int, opponent_score: int):
+        self.send(protocol.END_GAME, protocol.END_GAME_BODY.pack(int(your_score), int(opponent_score)), flush=True)
+
+    def close(self, timeout: float = 5.0):
+        """ Closes the bot's stdin, so it can finish up, and waits for it to exit. """
+        if self.is_alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self.process.terminate()
+
+    def __del__(self):
+        self.close()
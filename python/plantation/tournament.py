@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from plantation.bot_pool import has_crashed, release_player
+from plantation.engine import Engine
+from plantation.include import SeedLike, child_seed
+from plantation.match import PlayerFactory, make_engine
+
+
+class TournamentGame(NamedTuple):
+    game: int
+    entrant_p: str
+    entrant_m: str
+    score: float
+
+
+def schedule_games(
+        entrants: List[str],
+        num_games_per_pair: int,
+        self_play: bool = False
+) -> List[Tuple[int, str, str]]:
+    """ Every ordered pair plays num_games_per_pair // 2 times, so each
+    unordered pair plays num_games_per_pair games with equal first turns. """
+    games = []
+    for _iteration in range(num_games_per_pair // 2):
+        for entrant_p in entrants:
+            for entrant_m in entrants:
+                if entrant_p == entrant_m and not self_play:
+                    continue
+                games.append((len(games), entrant_p, entrant_m))
+    return games
+
+
+# per-process state for pool workers, set up once by _init_tournament_worker
+_worker_engine: Optional[Engine] = None
+_worker_factories: Dict[str, PlayerFactory] = {}
+_worker_seed: Optional[SeedLike] = None
+
+
+def _init_tournament_worker(
+        engine_kwargs: Dict,
+        factories: Dict[str, PlayerFactory],
+        seed: Optional[SeedLike] = None
+):
+    global _worker_engine, _worker_factories, _worker_seed
+    _worker_engine = make_engine(engine_kwargs)
+    _worker_factories = factories
+    _worker_seed = seed
+
+
+def _play_tournament_game(task: Tuple[int, str, str]) -> TournamentGame:
+    game, entrant_p, entrant_m = task
+    # fresh players for every game, so an entrant can play against itself.
+    # Pooled bots go back to their pool however the game ends, and are
+    # replaced unless it ended cleanly
+    players = []
+    failed = True
+    try:
+        player_p = _worker_factories[entrant_p]()
+        players.append(player_p)
+        player_m = _worker_factories[entrant_m]()
+        players.append(player_m)
+        seed = child_seed(_worker_seed, game) if _worker_seed is not None else None
+        try:
+            score = _worker_engine.run_game(player_handler_p=player_p, player_handler_m=player_m, seed=seed)
+        except (EOFError, BrokenPipeError):
+            # a bot process died: it loses as if it ran out of time
+            crashed_p, crashed_m = has_crashed(player_p), has_crashed(player_m)
+            if crashed_p == crashed_m:
+                raise
+            score = -100 if crashed_p else 100
+        else:
+            failed = False
+    finally:
+        for player in players:
+            release_player(player, failed)
+    return TournamentGame(game, entrant_p, entrant_m, score)
+
+
+def run_tournament(
+        factories: Dict[str, PlayerFactory],
+        num_games_per_pair: int,
+        engine_kwargs: Dict,
+        processes: Optional[int] = None,
+        self_play: bool = False,
+        seed: Optional[SeedLike] = None
+) -> Iterator[TournamentGame]:
+    """ Plays a round-robin tournament across a pool of worker processes.
+
+    `factories` maps entrant names to player factories. Players are built
+    fresh for every game inside the worker that plays it. A factory can be a
+    BotPool, in which case each worker keeps warm bots and reuses them. Results are yielded
+    as games finish. With a seed, every game is reproducible.
+    """
+    games = schedule_games(list(factories.keys()), num_games_per_pair, self_play)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(min(processes, len(games)), 1)
+
+    if processes == 1:
+        _init_tournament_worker(engine_kwargs, factories, seed)
+        for task in games:
+            yield _play_tournament_game(task)
+        return
+
+    with multiprocessing.Pool(
+            processes,
+            initializer=_init_tournament_worker,
+            initargs=(engine_kwargs, factories, seed)
+    ) as pool:
+        yield from pool.imap_unordered(_play_tournament_game, games)
+
+
+class TournamentStats:
+
+    def __init__(self, entrants: List[str]):
+        self.entrants = entrants
+        self.wins = {entrant: [] for entrant in entrants}
+        self.self_play = {entrant: [] for entrant in entrants}
+        self.num_games = 0
+
+    def add(self, result: TournamentGame):
+        score = result.score
+        if result.entrant_p == result.entrant_m:
+            self.self_play[result.entrant_p].append(score)
+            return
+
+        self.num_games += 1
+        if score > 0:
+            self.wins[result.entrant_p].append(abs(score))
+        elif score < 0:
+            self.wins[result.entrant_m].append(abs(score))
+
+    def print_summary(self):
+        for entrant in self.entrants:
+            win_count = len(self.wins[entrant])
+            print(f"{entrant} wins: {win_count} ({round(win_count/self.num_games*100, 0)} %)")
+
+        for entrant in self.entrants:
+            scores = self.self_play[entrant]
+            if len(scores) > 0:
+                p_wins = sum(1 for score in scores if score > 0)
+                print(f"{entrant} self-play: + seat won {p_wins} of {len(scores)}")
@@ -0,0 +1,225 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from plantation.engine import Engine
+from plantation.include import MOVES, MOVE_CODES, RESULT_OK, RESULT_ERROR, RESULT_OCCUPIED
+
+FERTILISE = MOVE_CODES['fertilise']
+PLANT = MOVE_CODES['plant']
+SCOUT = MOVE_CODES['scout']
+COLONISE = MOVE_CODES['colonise']
+SPRAY = MOVE_CODES['spray']
+BOMB = MOVE_CODES['bomb']
+
+# a policy gets the player's restricted boards, the turn and the moves remaining
+# in each game, and returns an array of move codes and an (N, 4) array of positions
+VectorPolicy = Callable[[np.ndarray, int, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class VectorEngine:
+    """ Plays N games in lockstep on a single (N, rows, cols) board array.
+
+    Moves are given as opcodes (indices into `include.MOVES`) with positions
+    as an (N, 4) array of [row, col, source_row, source_col]; the source is
+    only read for colonise. Results come back as arrays of result codes
+    (`include.RESULT_*`), values, and 3x3 scout windows. A move code of -1
+    is a no-op which returns an error without touching the board.
+    """
+
+    moves_required = np.array([Engine.moves_required[move] for move in MOVES])
+    bomb_damage = Engine.bomb_damage
+    cross = ((-1, 0), (1, 0), (0, -1), (0, 1), (0, 0))
+
+    def __init__(
+            self,
+            num_games: int,
+            num_rows: int,
+            num_cols: int,
+            starting_tiles: int,
+            max_turns: int
+    ):
+        self.num_games = num_games
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.starting_tiles = starting_tiles
+        self.max_turns = max_turns
+        self.boards = None
+        self.turn = 0
+        self.game_index = np.arange(num_games)
+
+    def initialise_boards(self, rng: Optional[np.random.Generator] = None) -> None:
+        if rng is None:
+            rng = np.random.default_rng()
+        n = self.num_games
+        self.boards = np.zeros((n, self.num_rows, self.num_cols), dtype=np.short)
+
+        games = self.game_index[:, None]
+        random_rows = rng.random((n, self.num_rows)).argsort(axis=1)[:, :self.starting_tiles]
+        self.boards[games, random_rows, 0] = 1
+
+        random_rows = rng.random((n, self.num_rows)).argsort(axis=1)[:, :self.starting_tiles]
+        self.boards[games, random_rows, -1] = -1
+
+    def run_games(
+            self,
+            policy_p: VectorPolicy,
+            policy_m: VectorPolicy,
+            rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """ Plays all games to the end and returns the final scores (p + m). """
+        self.initialise_boards(rng)
+        for self.turn in range(1, self.max_turns + 1):
+            self.run_turn(1, policy_p)
+            self.run_turn(-1, policy_m)
+
+        p_scores, m_scores = self.score_games()
+        return p_scores + m_scores
+
+    def run_turn(self, sign: int, policy: VectorPolicy) -> None:
+        moves_remaining = np.full(self.num_games, 3)
+        while np.any(moves_remaining > 0):
+            active = moves_remaining > 0
+            moves, pos = policy(
+                self.get_restricted_boards(sign), self.turn, moves_remaining
+            )
+            moves = np.where(active, moves, -1)
+            self.do_moves(moves, pos, sign, moves_remaining)
+            moves_remaining -= np.where(active, self.moves_taken(moves), 0)
+
+    def get_restricted_boards(self, sign: int) -> np.ndarray:
+        boards = self.boards
+        return boards * (boards * sign > 0)
+
+    def score_games(self) -> Tuple[np.ndarray, np.ndarray]:
+        boards = self.boards.astype(int)
+        p_scores = np.where(boards > 0, boards, 0).sum(axis=(1, 2))
+        m_scores = np.where(boards < 0, boards, 0).sum(axis=(1, 2))
+        return p_scores, m_scores
+
+    def moves_taken(self, moves: np.ndarray) -> np.ndarray:
+        """ Moves used up by each move code, as charged by Engine even on errors. """
+        known = (moves >= 0) & (moves < len(MOVES))
+        return np.where(known, self.moves_required[np.where(known, moves, 0)], 1)
+
+    def do_moves(
+            self,
+            moves: np.ndarray,
+            pos: np.ndarray,
+            sign,
+            moves_remaining
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = self.num_games
+        moves = np.asarray(moves)
+        pos = np.asarray(pos, dtype=int)
+        if pos.shape[1] < 4:
+            pos = np.pad(pos, ((0, 0), (0, 4 - pos.shape[1])))
+        sign = np.broadcast_to(np.asarray(sign, dtype=int), (n,))
+        moves_remaining = np.broadcast_to(np.asarray(moves_remaining), (n,))
+
+        codes = np.full(n, RESULT_ERROR, dtype=np.int8)
+        values = np.zeros(n, dtype=np.short)
+        scout = np.zeros((n, 3, 3), dtype=np.short)
+
+        row, col = pos[:, 0], pos[:, 1]
+        valid = (moves >= 0) & (moves < len(MOVES)) \
+            & (row >= 0) & (row < self.num_rows) \
+            & (col >= 0) & (col < self.num_cols)
+        valid &= self.moves_taken(moves) <= moves_remaining
+
+        row = np.clip(row, 0, self.num_rows - 1)
+        col = np.clip(col, 0, self.num_cols - 1)
+        target = self.boards[self.game_index, row, col] * sign
+
+        self.fertilise_kernel(valid & (moves == FERTILISE), row, col, sign, target, codes)
+        self.plant_kernel(valid & (moves == PLANT), row, col, sign, target, codes, values)
+        self.scout_kernel(valid & (moves == SCOUT), row, col, codes, scout)
+        self.colonise_kernel(valid & (moves == COLONISE), pos, sign, target, codes, values)
+        self.spray_kernel(valid & (moves == SPRAY), row, col, sign, codes, values)
+        self.bomb_kernel(valid & (moves == BOMB), row, col, sign, target, codes, values)
+
+        return codes, values, scout
+
+    def fertilise_kernel(self, mask, row, col, sign, target, codes) -> None:
+        mask = mask & (target > 0)
+        games = self.game_index[mask]
+        self.boards[games, row[mask], col[mask]] += sign[mask]
+        codes[mask] = RESULT_OK
+
+    def plant_kernel(self, mask, row, col, sign, target, codes, values) -> None:
+        occupied = mask & (target < 0)
+        codes[occupied] = RESULT_OCCUPIED
+        values[occupied] = self.boards[self.game_index[occupied], row[occupied], col[occupied]]
+
+        empty = mask & (target == 0)
+        games = self.game_index[empty]
+        if len(games) == 0:
+            return
+        r, c, s = row[empty], col[empty], sign[empty]
+        owned = np.pad(self.boards[games] * s[:, None, None] > 0, ((0, 0), (1, 1), (1, 1)))
+        k = np.arange(len(games))
+        adjacent = owned[k, r, c + 1] | owned[k, r + 2, c + 1] \
+            | owned[k, r + 1, c] | owned[k, r + 1, c + 2]
+
+        self.boards[games[adjacent], r[adjacent], c[adjacent]] = s[adjacent]
+        codes[games[adjacent]] = RESULT_OK
+
+    def scout_kernel(self, mask, row, col, codes, scout) -> None:
+        games = self.game_index[mask]
+        if len(games) == 0:
+            return
+        padded = np.pad(self.boards[games], ((0, 0), (1, 1), (1, 1)))
+        window = np.arange(3)
+        rows = row[mask][:, None, None] + window[None, :, None]
+        cols = col[mask][:, None, None] + window[None, None, :]
+        k = np.arange(len(games))[:, None, None]
+        scout[mask] = padded[k, rows, cols]
+        codes[mask] = RESULT_OK
+
+    def colonise_kernel(self, mask, pos, sign, target, codes, values) -> None:
+        source_row, source_col = pos[:, 2], pos[:, 3]
+        mask = mask & (source_row >= 0) & (source_row < self.num_rows) \
+            & (source_col >= 0) & (source_col < self.num_cols)
+        mask &= target <= 0
+
+        source = self.boards[
+            self.game_index,
+            np.clip(source_row, 0, self.num_rows - 1),
+            np.clip(source_col, 0, self.num_cols - 1)
+        ] * sign
+        mask &= source >= 2
+
+        occupied = mask & (target < 0)
+        codes[occupied] = RESULT_OCCUPIED
+        values[occupied] = self.boards[self.game_index[occupied], pos[occupied, 0], pos[occupied, 1]]
+
+        empty = mask & (target == 0)
+        games = self.game_index[empty]
+        self.boards[games, pos[empty, 0], pos[empty, 1]] = sign[empty]
+        self.boards[games, source_row[empty], source_col[empty]] -= sign[empty]
+        codes[empty] = RESULT_OK
+
+    def spray_kernel(self, mask, row, col, sign, codes, values) -> None:
+        games = self.game_index[mask]
+        r, c, s = row[mask], col[mask], sign[mask]
+        total = np.zeros(len(games), dtype=np.short)
+        for delta_r, delta_c in self.cross:
+            test_row = r + delta_r
+            test_col = c + delta_c
+            hit = (test_row >= 0) & (test_row < self.num_rows) \
+                & (test_col >= 0) & (test_col < self.num_cols)
+            test_row = np.clip(test_row, 0, self.num_rows - 1)
+            test_col = np.clip(test_col, 0, self.num_cols - 1)
+            hit &= self.boards[games, test_row, test_col] * s < 0
+            self.boards[games[hit], test_row[hit], test_col[hit]] += s[hit]
+            total += hit
+        codes[mask] = RESULT_OK
+        values[mask] = total
+
+    def bomb_kernel(self, mask, row, col, sign, target, codes, values) -> None:
+        mask = mask & (target <= 0)
+        games = self.game_index[mask]
+        levels_reduced = np.minimum(-target[mask], self.bomb_damage)
+        self.boards[games, row[mask], col[mask]] += (sign[mask] * levels_reduced).astype(np.short)
+        codes[mask] = RESULT_OK
+        values[mask] = levels_reduced
@@ -0,0 +1,27 @@
+import argparse
+import json
+
+from plantation.bench import BENCHMARKS, run_benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the engine, bots and I/O paths, and print the results as JSON")
+    # checked below rather than with choices, which argparse also applies to the empty default
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--quick', action='store_true', help="fewer repetitions, for a rough check")
+    parser.add_argument('--output', help="write the JSON here instead of to stdout")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}, expected some of: {', '.join(BENCHMARKS)}")
+
+    results = run_benchmarks(args.benchmarks, quick=args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,17 @@
-"""Smoke test - teach a simple MPL the rules of Plantation."""
+"""Smoke test - teach a simple MPL the rules of Plantation.
 
+Boards are synthetic (`jr.poisson`) by default. With `--self-play`, they are
+the boards players actually saw in games between two bots, streamed from
+background processes by `plantation.selfplay`.
+"""
+
+from collections.abc import Iterator
 import json
+import math
 from pathlib import Path
 import random
 import sys
-from typing import BinaryIO, Self
+from typing import BinaryIO, Callable, Self
 
 import click
 import equinox as eqx
@@ -13,6 +20,7 @@ import jax.lax as lax
 import jax.numpy as jnp
 import jax.random as jr
 from jaxtyping import Array, Float, PRNGKeyArray, PyTree, Scalar, UInt
+import numpy as np
 import optax
 from optax import GradientTransformation, OptState
 
@@ -45,6 +53,32 @@ type BoardUIntBatch = UInt[Array, "batch_size height width"]
 
 type BoardUIntSeqBatch = UInt[Array, "batch_size sim_steps height width"]
 
+type BoardSampler = Callable[[PRNGKeyArray, tuple[int, ...]], UInt[Array, "..."]]
+"""Draws boards of the given shape, ending in (height, width)"""
+
+
+def make_poisson_sampler(lam: float) -> BoardSampler:
+    return jax.jit(
+        lambda key, shape: jr.poisson(key, lam=lam, shape=shape),
+        static_argnums=1,
+    )
+
+
+def make_self_play_sampler(batches: Iterator[dict[str, np.ndarray]]) -> BoardSampler:
+    """Boards from `plantation.selfplay.self_play_batches`, as many batches as
+    it takes. The key is not used: the order comes from the stream."""
+    def sample(key: PRNGKeyArray, shape: tuple[int, ...]) -> UInt[Array, "..."]:
+        size = math.prod(shape[:-2])
+        boards = []
+        while sum(len(b) for b in boards) < size:
+            boards.append(next(batches)["board"])
+
+        return jnp.asarray(
+            np.concatenate(boards)[:size].reshape(shape).astype(np.int32)
+        )
+
+    return sample
+
 
 class LearningAgent(AbstractAgent[None, ActionPMF, BoardUInt]):
     trainable_map: PyTree # TODO How to say "callable Module"?
@@ -156,9 +190,9 @@ def make_train_step(
         BoardUInt, BoardUIntSeq, ActionPMF, ActionPMFs
     ],
     optimiser: GradientTransformation,
+    sample_boards: BoardSampler,
     sim_steps: int,
     batch_size: int,
-    lam: float,
 ) -> tuple[
         TrainStepFn[LearningAgent, OptState],
         OptState
@@ -184,26 +218,11 @@ def make_train_step(
         return -scores.mean()
 
     @eqx.filter_jit
-    def train_step(
+    def update(
         agent: LearningAgent,
         train_state: OptState,
-        rng_key: PRNGKeyArray,
+        exo_state: ExoState[BoardUIntBatch, BoardUIntSeqBatch],
     ) -> tuple[LearningAgent, OptState]:
-        k1, k2 = jr.split(rng_key)
-
-        exo_state = ExoState[BoardUIntBatch, BoardUIntSeqBatch](
-            initial=jr.poisson(
-                k1,
-                lam=lam,
-                shape=(batch_size, BOARD_HEIGHT, BOARD_WIDTH),
-            ),
-            sequence=jr.poisson(
-                k2,
-                lam=lam,
-                shape=(batch_size, sim_steps, BOARD_HEIGHT, BOARD_WIDTH),
-            ),
-        )
-
         grads = compute_loss(agent, exo_state)
 
         updates, train_state = optimiser.update(
@@ -213,6 +232,22 @@ def make_train_step(
 
         return agent, train_state
 
+    # Sampling stays outside `update`, so boards can come from outside JAX
+    def train_step(
+        agent: LearningAgent,
+        train_state: OptState,
+        rng_key: PRNGKeyArray,
+    ) -> tuple[LearningAgent, OptState]:
+        boards = sample_boards(
+            rng_key, (batch_size, sim_steps + 1, BOARD_HEIGHT, BOARD_WIDTH)
+        )
+        exo_state = ExoState[BoardUIntBatch, BoardUIntSeqBatch](
+            initial=boards[:, 0],
+            sequence=boards[:, 1:],
+        )
+
+        return update(agent, train_state, exo_state)
+
     opt_state = optimiser.init(eqx.filter(agent, eqx.is_array))
 
     return train_step, opt_state  # type: ignore  # FIXME
@@ -220,13 +255,11 @@ def make_train_step(
 
 def test(
     agent: LearningAgent,
-    lam: float,
+    sample_boards: BoardSampler,
     rng_key: PRNGKeyArray,
     batch_size: int = 10000,
 ):
-    boards = jr.poisson(
-        rng_key, lam=lam, shape=(batch_size, BOARD_HEIGHT, BOARD_WIDTH)
-    )
+    boards = sample_boards(rng_key, (batch_size, BOARD_HEIGHT, BOARD_WIDTH))
 
     actions = eqx.filter_vmap(
         agent.react, in_axes=(None, 0),
@@ -244,6 +277,7 @@ BATCH_SIZE = 1024
 LAMBDA = 0.25
 MLP_WIDTH = 128
 MLP_DEPTH = 1
+SELF_PLAY_BOTS = ("scry-and-die", "random")
 
 
 @click.command
@@ -290,6 +324,23 @@ MLP_DEPTH = 1
     type=click.IntRange(min=0, min_open=True),
     default=MLP_DEPTH,
 )
+@click.option(
+    "--self-play",
+    is_flag=True,
+    help="Train on boards from games between two bots instead of synthetic ones",
+)
+@click.option(
+    "--bots",
+    nargs=2,
+    default=SELF_PLAY_BOTS,
+    help="The two bots for --self-play, by name as in `plantation bots`",
+)
+@click.option(
+    "--processes",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Worker processes playing --self-play games (0 plays them in-process)",
+)
 @click.option(
     "--rng-seed",
     type=click.IntRange(min=0),
@@ -306,10 +357,31 @@ def train_cmd(
     lambda_,
     mlp_width,
     mlp_depth,
+    self_play,
+    bots,
+    processes,
     rng_seed,
 ):
     key = jr.PRNGKey(rng_seed)
 
+    if self_play:
+        from plantation.cli import ENGINE_DEFAULTS
+        from plantation.registry import BotFactory
+        from plantation.selfplay import self_play_batches
+
+        batches = self_play_batches(
+            BotFactory(bots[0]),
+            BotFactory(bots[1]),
+            batch_size=1024,
+            engine_kwargs=dict(ENGINE_DEFAULTS, starting_seconds=1000.0),
+            processes=processes,
+            seed=rng_seed,
+            rng=np.random.default_rng(rng_seed),
+        )
+        sample_boards = make_self_play_sampler(batches)
+    else:
+        sample_boards = make_poisson_sampler(lambda_)
+
     if load is None:
         hyperparams = {
             "board_height": BOARD_HEIGHT,
@@ -324,7 +396,7 @@ def train_cmd(
         agent = LearningAgent.load(load)
 
     key, subkey = jr.split(key)
-    metric = test(agent, lambda_, subkey)
+    metric = test(agent, sample_boards, subkey)
     print(f"{'Before training:':16}", f"{metric:4.6f}")
 
     simulate = Simulator[
@@ -337,9 +409,9 @@ def train_cmd(
         agent,
         simulate,
         optimiser,
+        sample_boards,
         sim_steps,
         batch_size,
-        lam=lambda_,
     )
 
     train = Trainer[LearningAgent, OptState](train_step)
@@ -351,7 +423,7 @@ def train_cmd(
         agent.save(save)
 
     key, subkey = jr.split(key)
-    metric = test(agent, lambda_, subkey)
+    metric = test(agent, sample_boards, subkey)
     print(f"{'After training:':16}", f"{metric:4.6f}")
 
 
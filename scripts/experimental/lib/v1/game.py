@@ -4,7 +4,7 @@ from enum import IntEnum
 
 import jax.lax as lax
 import jax.numpy as jnp
-from jaxtyping import Array, Bool, UInt
+from jaxtyping import Array, ArrayLike, Bool, Int, UInt
 
 
 BOARD_HEIGHT = 11
@@ -14,11 +14,18 @@ BOARD_SHAPE = (BOARD_HEIGHT, BOARD_WIDTH)
 
 type BoardBool = Bool[Array, "height width"]
 type BoardUInt = UInt[Array, "height width"]
+type BoardInt = Int[Array, "height width"]
+"""The whole board, with + and - for the two players' pieces, as in `Engine`"""
 
-NUM_ACTIONS = 2
+NUM_ACTIONS = 6
 
 type ActionBool = Bool[Array, "height width actions"]
 
+type Action = Int[ArrayLike, "5"]
+"""An `Act`, then row and column, then source row and column for colonise"""
+
+type IntScalar = Int[Array, ""]
+
 
 class Act(IntEnum):
     """Index of an action type in the `actions` dimension of `ActionBool`"""
@@ -32,20 +39,42 @@ class Act(IntEnum):
     """Bomb"""
     SP = 4
     """Spray"""
-    # CO = 5  # FIXME What about this, son?
+    CO = 5
+    """Colonise, at the target tile; see `allowed_colonise_sources`"""
+
+
+ACTION_COST = (1, 1, 1, 2, 2, 2)
+"""Moves used by each `Act`, of the three in a turn"""
 
+# Result codes, as in `plantation.include`
+OK = 0
+ERROR = 1
+OCCUPIED = 2
 
-def allowed_actions(player_board: BoardUInt) -> ActionBool:
+BOMB_DAMAGE = 4
+
+
+def allowed_actions(
+    player_board: BoardUInt,
+    moves_remaining: int | IntScalar = 3,
+) -> ActionBool:
     """Actions allowed according to the state of ONE PLAYER's pieces.
 
     Actions are considered allowed even if their direct effect on the board is
-    ultimately blocked due to the opponent's position.
+    ultimately blocked due to the opponent's position. Actions costing more
+    than `moves_remaining` are not allowed.
     """
+    two_moves = jnp.asarray(moves_remaining) >= 2
+
     # NOTE Maintain the correct order in the stack, as in enum `Act`.
     return jnp.stack(
         (
             allowed_fertilise(player_board),
             allowed_plant(player_board),
+            allowed_scout(player_board),
+            allowed_bomb(player_board) & two_moves,
+            allowed_spray(player_board) & two_moves,
+            allowed_colonise(player_board) & two_moves,
         ),
         axis=-1,
     )
@@ -57,15 +86,140 @@ def allowed_fertilise(player_board: BoardUInt) -> BoardBool:
 
 def allowed_plant(player_board: BoardUInt) -> BoardBool:
     occupied = player_board.astype('bool')
+    padded = jnp.pad(occupied, 1)
 
-    return lax.full_like(
-        occupied, False
-    ).at[:, 1:].set(
-        occupied[:, :-1]
-    ).at[:, :-1].set(
-        occupied[:, 1:]
-    ).at[:-1, :].set(
-        occupied[1:, :]
-    ).at[1:, :].set(
-        occupied[:-1, :]
+    return (
+        padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
     ) & ~occupied
+
+
+def allowed_scout(player_board: BoardUInt) -> BoardBool:
+    return lax.full_like(player_board, True, dtype='bool')
+
+
+def allowed_bomb(player_board: BoardUInt) -> BoardBool:
+    return ~player_board.astype('bool')
+
+
+def allowed_spray(player_board: BoardUInt) -> BoardBool:
+    return ~player_board.astype('bool')
+
+
+def allowed_colonise(player_board: BoardUInt) -> BoardBool:
+    """Colonise targets, given that there is some source to colonise from"""
+    return ~player_board.astype('bool') & allowed_colonise_sources(
+        player_board
+    ).any()
+
+
+def allowed_colonise_sources(player_board: BoardUInt) -> BoardBool:
+    return player_board >= 2
+
+
+def step(
+    board: BoardInt,
+    action: Action,
+    sign: int | IntScalar,
+    moves_remaining: int | IntScalar = 3,
+) -> tuple[BoardInt, IntScalar, IntScalar]:
+    """Plays `action` for the player `sign` (+1 or -1), as `Engine.do_move`.
+
+    Returns the new board, the result code and the result value: the
+    opponent's (signed) tile for OCCUPIED, the tiles or levels hit by spray
+    and bomb, and 0 otherwise. A move costing more than `moves_remaining`, or
+    with its target off the board, is an ERROR; the move's cost is used up
+    either way, see `ACTION_COST`. Use `scout` for what a scout sees.
+
+    Pure and jittable, and batches with `vmap`. Colonise sources are assumed
+    to be on the board.
+    """
+    act, row, col, source_row, source_col = jnp.asarray(action)
+    height, width = board.shape
+    valid = (
+        (0 <= row) & (row < height) & (0 <= col) & (col < width)
+        & (jnp.asarray(ACTION_COST)[act] <= moves_remaining)
+    )
+    row = jnp.clip(row, 0, height - 1)
+    col = jnp.clip(col, 0, width - 1)
+    sign = jnp.asarray(sign, dtype=board.dtype)
+    mine = board * sign
+    target = mine[row, col]
+
+    # NOTE The branches of `lax.switch` must agree on dtypes, whatever the
+    # dtype of the board, e.g. `Engine`'s int16.
+    def result(new_board, code, value):
+        return (
+            jnp.asarray(new_board).astype(board.dtype),
+            jnp.asarray(code).astype(int),
+            jnp.asarray(value).astype(int),
+        )
+
+    def fertilise():
+        ok = target > 0
+        return result(
+            board.at[row, col].add(jnp.where(ok, sign, 0)),
+            jnp.where(ok, OK, ERROR),
+            0,
+        )
+
+    def plant():
+        adjacent = allowed_plant(mine > 0)[row, col]
+        code = jnp.where(
+            target > 0, ERROR,
+            jnp.where(target < 0, OCCUPIED, jnp.where(adjacent, OK, ERROR)),
+        )
+        return result(
+            board.at[row, col].set(jnp.where(code == OK, sign, board[row, col])),
+            code,
+            jnp.where(code == OCCUPIED, board[row, col], 0),
+        )
+
+    def scout_():
+        return result(board, OK, 0)
+
+    def bomb():
+        levels = jnp.where(target > 0, 0, jnp.minimum(-target, BOMB_DAMAGE))
+        return result(
+            board.at[row, col].add(sign * levels),
+            jnp.where(target > 0, ERROR, OK),
+            levels,
+        )
+
+    def spray():
+        rows = jnp.arange(height)[:, None]
+        cols = jnp.arange(width)[None, :]
+        hit = (jnp.abs(rows - row) + jnp.abs(cols - col) <= 1) & (mine < 0)
+        return result(board + sign * hit, OK, hit.sum())
+
+    def colonise():
+        source = mine[source_row, source_col]
+        code = jnp.where(
+            target > 0, ERROR,
+            jnp.where(source < 2, ERROR, jnp.where(target < 0, OCCUPIED, OK)),
+        )
+        ok = code == OK
+        return result(
+            board.at[row, col].set(jnp.where(ok, sign, board[row, col]))
+                 .at[source_row, source_col].add(jnp.where(ok, -sign, 0)),
+            code,
+            jnp.where(code == OCCUPIED, board[row, col], 0),
+        )
+
+    # NOTE Maintain the order of enum `Act`.
+    new_board, code, value = lax.switch(
+        act, (fertilise, plant, scout_, bomb, spray, colonise)
+    )
+    return (
+        jnp.where(valid, new_board, board),
+        jnp.where(valid, code, ERROR),
+        jnp.where(valid, value, 0),
+    )
+
+
+def scout(board: BoardInt, row: IntScalar, col: IntScalar) -> Int[Array, "3 3"]:
+    """The 3x3 block of the board centred on (row, col), with 0 off the board.
+
+    `Engine` clips the block at the edge of the board instead.
+    """
+    padded = jnp.pad(board, 1)
+    return lax.dynamic_slice(padded, (row, col), (3, 3))
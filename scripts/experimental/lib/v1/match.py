@@ -0,0 +1,211 @@
+"""Whole games between two policies, as one `lax.scan`, after `Engine`.
+
+`play_game` compiles to a single scan over the turns, so that `play_games`
+can `vmap` it over thousands of games, e.g. to evaluate a policy on a CPU
+without the Python engine.
+"""
+
+from abc import abstractmethod
+
+import equinox as eqx
+from equinox import Module
+import jax
+import jax.lax as lax
+import jax.numpy as jnp
+import jax.random as jr
+from jaxtyping import Array, Bool, Int, PRNGKeyArray
+
+from .game import (
+    ACTION_COST,
+    BOARD_SHAPE,
+    ERROR,
+    Action,
+    BoardInt,
+    BoardUInt,
+    IntScalar,
+    allowed_actions,
+    allowed_colonise_sources,
+    step,
+)
+
+
+MAX_TURNS = 100
+MOVES_PER_TURN = 3
+STARTING_TILES = 3
+
+
+class AbstractPolicy(Module, strict=True):
+    @abstractmethod
+    def __call__(
+        self,
+        board: BoardUInt,
+        turn: IntScalar,
+        moves_remaining: IntScalar,
+        key: PRNGKeyArray,
+    ) -> Action:
+        """The next move, as `Player.get_move`.
+
+        `board` is the restricted board of the player to move, with their own
+        tiles as positive counts whichever seat they are in.
+        """
+        ...
+
+
+class UniformLegalPolicy(AbstractPolicy, strict=True):
+    """Picks uniformly among the moves in `allowed_actions`."""
+
+    def __call__(
+        self,
+        board: BoardUInt,
+        turn: IntScalar,
+        moves_remaining: IntScalar,
+        key: PRNGKeyArray,
+    ) -> Action:
+        action_key, source_key = jr.split(key)
+        allowed = allowed_actions(board, moves_remaining)
+        row, col, act = uniform_choice(action_key, allowed)
+        source_row, source_col = uniform_choice(
+            source_key, allowed_colonise_sources(board)
+        )
+
+        return jnp.stack((act, row, col, source_row, source_col))
+
+
+def uniform_choice(
+    key: PRNGKeyArray,
+    allowed: Bool[Array, "..."],
+) -> tuple[IntScalar, ...]:
+    """The index of an entry of `allowed` picked uniformly among those True,
+    or of the first entry if there are none.
+
+    Draws one integer, where `jr.categorical` draws a float for every entry.
+    """
+    counts = jnp.cumsum(allowed.ravel())
+    pick = jr.randint(key, (), 0, counts[-1])
+
+    return jnp.unravel_index(jnp.argmax(counts > pick), allowed.shape)
+
+
+class GameOutcome(Module, strict=True):
+    board: BoardInt
+    """The final board"""
+    p_score: IntScalar
+    m_score: IntScalar
+    """Negative, as in `Engine.score_game`"""
+    errors: Int[Array, "2"]
+    """Moves that were errors, for the + and - player"""
+
+    @property
+    def score(self) -> IntScalar:
+        """Positive when the + player wins, as returned by `Engine.run_game`"""
+        return self.p_score + self.m_score
+
+
+def initial_board(
+    key: PRNGKeyArray,
+    board_shape: tuple[int, int] = BOARD_SHAPE,
+    starting_tiles: int = STARTING_TILES,
+) -> BoardInt:
+    """Tiles in random rows of the first column for + and the last for -"""
+    p_key, m_key = jr.split(key)
+    height, width = board_shape
+    p_rows = jr.choice(p_key, height, (starting_tiles,), replace=False)
+    m_rows = jr.choice(m_key, height, (starting_tiles,), replace=False)
+
+    return jnp.zeros(board_shape, dtype=int).at[p_rows, 0].set(
+        1
+    ).at[m_rows, width - 1].set(-1)
+
+
+def play_turn(
+    policy: AbstractPolicy,
+    board: BoardInt,
+    sign: int,
+    turn: IntScalar,
+    key: PRNGKeyArray,
+) -> tuple[BoardInt, IntScalar]:
+    """One player's turn, returning the board and the number of errors.
+
+    Every move costs at least one, so the turn is a fixed number of move
+    slots, with those after the moves run out left as no-ops. As in `Engine`,
+    a move costing more than the moves remaining is an error, and ends the
+    turn.
+    """
+    def move(carry, move_key):
+        board, moves_remaining, errors = carry
+        action = policy(jnp.maximum(board * sign, 0), turn, moves_remaining, move_key)
+        new_board, code, _ = step(board, action, sign, moves_remaining)
+        playing = moves_remaining > 0
+
+        return (
+            jnp.where(playing, new_board, board),
+            moves_remaining - playing * jnp.asarray(ACTION_COST)[action[0]],
+            errors + (playing & (code == ERROR)),
+        ), None
+
+    (board, _, errors), _ = lax.scan(
+        move,
+        init=(board, jnp.asarray(MOVES_PER_TURN), jnp.asarray(0)),
+        xs=jr.split(key, MOVES_PER_TURN),
+    )
+
+    return board, errors
+
+
+def play_game(
+    policy_p: AbstractPolicy,
+    policy_m: AbstractPolicy,
+    key: PRNGKeyArray,
+    board_shape: tuple[int, int] = BOARD_SHAPE,
+    max_turns: int = MAX_TURNS,
+    starting_tiles: int = STARTING_TILES,
+) -> GameOutcome:
+    """Plays a game, `policy_p` moving first, as `Engine.run_game`.
+
+    There are no clocks, and policies are not told their move results, so
+    scouting is of no use to them.
+    """
+    board_key, turns_key = jr.split(key)
+
+    def turn(carry, xs):
+        board, errors = carry
+        turn, turn_key = xs
+        p_key, m_key = jr.split(turn_key)
+        board, p_errors = play_turn(policy_p, board, 1, turn, p_key)
+        board, m_errors = play_turn(policy_m, board, -1, turn, m_key)
+
+        return (board, errors + jnp.stack((p_errors, m_errors))), None
+
+    (board, errors), _ = lax.scan(
+        turn,
+        init=(
+            initial_board(board_key, board_shape, starting_tiles),
+            jnp.zeros(2, dtype=int),
+        ),
+        xs=(jnp.arange(1, max_turns + 1), jr.split(turns_key, max_turns)),
+    )
+
+    return GameOutcome(
+        board,
+        jnp.where(board > 0, board, 0).sum(),
+        jnp.where(board < 0, board, 0).sum(),
+        errors,
+    )
+
+
+@eqx.filter_jit
+def play_games(
+    policy_p: AbstractPolicy,
+    policy_m: AbstractPolicy,
+    keys: PRNGKeyArray,
+    board_shape: tuple[int, int] = BOARD_SHAPE,
+    max_turns: int = MAX_TURNS,
+    starting_tiles: int = STARTING_TILES,
+) -> GameOutcome:
+    """A game for each of `keys`, batched with `vmap` and compiled once for
+    each pair of policies and game settings."""
+    return jax.vmap(
+        lambda key: play_game(
+            policy_p, policy_m, key, board_shape, max_turns, starting_tiles
+        )
+    )(keys)
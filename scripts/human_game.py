@@ -1,9 +1,5 @@
-from plantation.ai_players.random_player import RandomPlayer
-from plantation.ai_players.random_player_dumb import RandomPlayerDumb
-from plantation.ai_players.scry_and_die import ScryAndDie
-from plantation.ai_players.human import HumanPlayer
-
 from plantation.engine import Engine
+from plantation.registry import load_bot
 
 
 def main():
@@ -15,8 +11,8 @@ def main():
         starting_seconds=1000.0,
         time_increment=1000
     )
-    player_handler_a = HumanPlayer(name="NobbityBop")
-    player_handler_b = ScryAndDie(name="Xykon")
+    player_handler_a = load_bot('human')(name="NobbityBop")
+    player_handler_b = load_bot('scry-and-die')(name="Xykon")
 
     engine.output = 'output.txt'
     _score = engine.run_game(
@@ -1,16 +1,15 @@
-import numpy as np
-
-from plantation.ai_players.random_player import RandomPlayer
-from plantation.ai_players.scry_and_die import ScryAndDie
-from plantation.ai_players.paulc.php_player_wrapper import PHPPlayerWrapper
-from plantation.engine import Engine
-import time
+from plantation.cli import play_match
+from plantation.registry import BotFactory
 
 
 def main():
     num_games = 100
+    # set to an int to make the match reproducible
+    seed = None
 
-    # player_a = RandomPlayer(
+    # bots are named as in `plantation bots`, and only imported by the processes that play them
+    # player_a = BotFactory(
+    #     'random',
     #     move_probabilities={
     #         'fertilise': 3,
     #         'plant': 4,
@@ -21,8 +20,8 @@ def main():
     #     name="DukeNukem"
     # )
 
-    # player_b = RandomPlayer(
-    #     1,
+    # player_b = BotFactory(
+    #     'random',
     #     move_probabilities={
     #         'fertilise': 10,
     #         'plant': 10,
@@ -31,11 +30,11 @@ def main():
     #         'bomb': 1
     #     }, name="CarlRogers")
 
-    player_a = ScryAndDie(name="Vaarsuvius")
-    #player_b = ScryAndDie(name="Xykon")
-    player_b = PHPPlayerWrapper(name="Crocodilian", php_file='genetic.php')
+    player_a = BotFactory('scry-and-die', name="Vaarsuvius")
+    #player_b = BotFactory('scry-and-die', name="Xykon")
+    player_b = BotFactory('php', name="Crocodilian", php_file='genetic.php')
 
-    engine = Engine(
+    engine_kwargs = dict(
         num_rows=11,
         num_cols=11,
         max_turns=100,
@@ -44,67 +43,8 @@ def main():
         time_increment=0.1
     )
 
-    engine.output = None
-    wins = {
-        player_a.name: [],
-        player_b.name: [],
-        'draw': []
-    }
-
-    print("Running games: [", end="")
-    start_time = time.time()
-    for game in range(num_games):
-        # print progress bar
-        if game % max((num_games // 20), 1) == 0:
-            print("=", end="")
-
-        score = engine.run_game(
-            player_handler_p=player_a,
-            player_handler_m=player_b
-        )
-
-        if score > 0:
-            wins[player_a.name].append(abs(score))
-        elif score < 0:
-            wins[player_b.name].append(abs(score))
-        else:
-            wins['draw'].append(0)
-
-        if score == 100:
-            print(player_b.name, "ran out of time")
-        elif score == -100:
-            print(player_a.name, "ran out of time")
-
-        player_a, player_b = player_b, player_a
-
-    print("]")
-    print()
-    signed_scores = wins[player_a.name] + [-x for x in wins[player_b.name]]
-
-    a_wins = len(wins[player_a.name])
-    b_wins = len(wins[player_b.name])
-    if a_wins > b_wins:
-        print(f"{player_a.name} is the winner!!")
-    elif b_wins > a_wins:
-        print(f"{player_b.name} is the winner!!")
-    else:
-        print(f"It is a draw")
-
-    print(f"{player_a.name} wins: {a_wins}")
-    print(f"{player_b.name} wins: {b_wins}")
-    print(f"Draws: {len(wins['draw'])}")
-    print()
-    print("Detailed results:")
-    print(f"{player_a.name} wins: \n{wins[player_a.name]}\n")
-    print(f"{player_b.name} wins: \n{wins[player_b.name]}")
-
-    print(f"Average score, if we count scores for {player_b.name} as negative: "
-          f"{np.mean(signed_scores):.2f}, (sigma: {np.std(signed_scores):.2f})")
+    play_match(player_a, player_b, num_games, engine_kwargs, seed=seed)
 
-    # Calculate and print the duration
-    end_time = time.time()
-    duration = end_time - start_time
-    print("Seconds:", duration)
 
 if __name__ == '__main__':
     main()
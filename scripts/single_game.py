@@ -1,7 +1,5 @@
-from plantation.ai_players.random_player import RandomPlayer
-from plantation.ai_players.scry_and_die import ScryAndDie
-from plantation.ai_players.paulc.php_player_wrapper import PHPPlayerWrapper
 from plantation.engine import Engine
+from plantation.registry import load_bot
 
 def main():
 
@@ -13,8 +11,7 @@ def main():
         starting_seconds=1000.0,
         time_increment=1000
     )
-    # player_handler_a = RandomPlayer(
-    #     1,
+    # player_handler_a = load_bot('random')(
     #     move_probabilities={
     #         'fertilise': 0.3,
     #         'plant': 0.5,
@@ -22,8 +19,7 @@ def main():
     #         'spray': 0.05,
     #         'bomb': 0.05
     #     }, name="DukeNukem")
-    # player_handler_b = RandomPlayer(
-    #     1,
+    # player_handler_b = load_bot('random')(
     #     move_probabilities={
     #         'fertilise': 10,
     #         'plant': 10,
@@ -31,9 +27,9 @@ def main():
     #         'spray': 2,
     #         'bomb': 1
     #     }, name="CarlRogers")
-    # player_handler_b = RandomPlayerDumb(-1, name="Dumb")
-    player_handler_a = ScryAndDie(name="Xykon")
-    player_handler_b = PHPPlayerWrapper(name="Crocodilian", php_file="genetic.php")
+    # player_handler_b = load_bot('random-dumb')(name="Dumb")
+    player_handler_a = load_bot('scry-and-die')(name="Xykon")
+    player_handler_b = load_bot('php')(name="Crocodilian", php_file="genetic.php")
 
     engine.output = 'stdout'
     _score = engine.run_game(
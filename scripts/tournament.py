@@ -1,18 +1,12 @@
-import numpy as np
-
-from plantation.ai_players.random_player import RandomPlayer
-from plantation.ai_players.random_player_dumb import RandomPlayerDumb
-from plantation.ai_players.scry_and_die import ScryAndDie
-from plantation.ai_players.paulc.php_player_wrapper import PHPPlayerWrapper
-from plantation.engine import Engine
-import time
+from plantation.cli import play_tournament
+from plantation.registry import BotFactory
 
 
 def main():
     # this should be even to allow players to each get the same number of first turns
     num_games_per_pair = 20
 
-    engine = Engine(
+    engine_kwargs = dict(
         num_rows=11,
         num_cols=11,
         max_turns=100,
@@ -20,10 +14,11 @@ def main():
         starting_seconds=2000.0,
         time_increment=2000
     )
-    engine.output = None
 
-    players = [
-        RandomPlayer(
+    # players are built fresh for each game, so these are factories rather than instances
+    players = {
+        "CarlRogersRandom": BotFactory(
+            'random',
             move_probabilities={
                 'fertilise': 10,
                 'plant': 10,
@@ -32,72 +27,31 @@ def main():
                 'bomb': 1
             }, name="CarlRogersRandom"),
 
-        ScryAndDie(
+        "Vaarsuvius": BotFactory(
+            'scry-and-die',
             name="Vaarsuvius"
         ),
 
-        PHPPlayerWrapper(
+        "Crocodilian": BotFactory(
+            'php',
             name="Crocodilian",
             php_file="genetic.php"
         ),
 
-        PHPPlayerWrapper(
+        "Coelacanth": BotFactory(
+            'php',
             name="Coelacanth",
             php_file="genetic.php"
         ),
 
-        PHPPlayerWrapper(
+        "AvianDinosaur": BotFactory(
+            'php',
             name="AvianDinosaur",
             php_file="genetic.php"
         )
-    ];
-
-    wins = {}
-    for p in players:
-        wins[p.name] = []
-
-    num_games = num_games_per_pair * len(players) * (len(players) - 1) // 2
-    print(f"Running {num_games} games, being {num_games_per_pair} for each pair, between {len(players)} players, {num_games_per_pair*(len(players)-1)} games for each player")
-    print("Running games: [", end="")
-    start_time = time.time()
-    game = 0
-    for iterations in range(num_games_per_pair // 2):
-        for p1 in range(len(players)):
-            for p2 in range(len(players)):
-                if p1 == p2:
-                    continue; # playing yourself is regrettably hard, as we have just one instance of each player, so the state will collide
-                # print progress bar
-                game = game + 1
-                if game % (num_games // 20) == 0:
-                    print("=", end="")
-
-                score = engine.run_game(
-                    player_handler_p=players[p1],
-                    player_handler_m=players[p2],
-                )
-
-                if score > 0:
-                    wins[players[p1].name].append(abs(score))
-                elif score < 0:
-                    wins[players[p2].name].append(abs(score))
-
-                if score == 100:
-                    print(players[p2].name, "ran out of time")
-                elif score == -100:
-                    print(players[p1].name, "ran out of time")
-
-    print("]")
-    print()
-
-    for p in players:
-        win_count = len(wins[p.name])
-        print(f"{p.name} wins: {win_count} ({round(win_count/num_games*100, 0)} %)")
-    print()
+    }
 
-    # Calculate and print the duration
-    end_time = time.time()
-    duration = end_time - start_time
-    print("Seconds:", duration)
+    play_tournament(players, num_games_per_pair, engine_kwargs)
 
 
 if __name__ == '__main__':